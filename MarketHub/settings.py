@@ -12,6 +12,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,9 +49,30 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 1,
+    # orjson при наличии, иначе стандартный json (api/renderers.py, api/parsers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
+    # Token bucket для auth/login и auth/confirm (api/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_email': '3/min',
+        'login_ip': '20/min',
+        'confirm_email': '5/min',
+        'confirm_ip': '30/min',
+    },
+    # Число доверенных прокси перед приложением. При 0 IP для throttling берётся из REMOTE_ADDR,
+    # иначе клиент подставлял бы свой X-Forwarded-For и каждый раз получал новый bucket.
+    # За одним nginx — NUM_PROXIES=1 (берётся последний адрес, добавленный им)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -63,11 +85,13 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'api.authentication.LazyTokenUser',
 }
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,14 +126,76 @@ WSGI_APPLICATION = 'MarketHub.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': 'MarketHub',
-        'USER' : 'MarketHub',
-        'PASSWORD' : 'MarketHub',
-        'HOST' : '127.0.0.1',
-        'PORT' : 5432
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'MarketHub'),
+        'USER' : os.environ.get('DB_USER', 'MarketHub'),
+        'PASSWORD' : os.environ.get('DB_PASSWORD', 'MarketHub'),
+        'HOST' : os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT' : int(os.environ.get('DB_PORT', 5432)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Серверная подстановка параметров нужна, чтобы psycopg готовил
+            # prepared statements для запросов, выполненных prepare_threshold раз.
+            # За PgBouncer в режиме transaction выключать: DB_PREPARE_THRESHOLD=off
+            'server_side_binding': os.environ.get('DB_PREPARE_THRESHOLD', '5') != 'off',
+        },
     }
 }
+if DATABASES['default']['OPTIONS']['server_side_binding']:
+    DATABASES['default']['OPTIONS']['prepare_threshold'] = int(os.environ.get('DB_PREPARE_THRESHOLD', 5))
+
+# Пул соединений psycopg (пакет psycopg-pool) или постоянные соединения с CONN_MAX_AGE
+if os.environ.get('DB_POOL', '1') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+# Общий кэш: Redis при наличии REDIS_URL, иначе память процесса.
+# Алиас goods хранит готовый JSON карточек товаров (LRU по MAX_ENTRIES)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'markethub',
+    },
+    'goods': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'markethub-goods',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+if os.environ.get('REDIS_URL'):
+    for alias in CACHES:
+        CACHES[alias] = {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': alias,
+            'TIMEOUT': CACHES[alias].get('TIMEOUT', 300),
+        }
+
+GOOD_CACHE_ALIAS = 'goods'
+
+# Хранилище счётчиков throttling: local — память процесса, redis — общий для узлов
+THROTTLE_STORE = 'redis' if os.environ.get('REDIS_URL') else 'local'
+
+# Без REDIS_URL кэш у каждого процесса свой, и отзыв токенов деактивированных пользователей
+# не доходит до других воркеров: тогда is_active проверяется в БД не реже раза в столько секунд
+AUTH_ACTIVE_CHECK_TTL = 5
+
+# Так же без REDIS_URL версия дерева категорий перечитывается из БД не реже раза в столько секунд
+CATEGORY_TREE_CHECK_TTL = 5
+
+# Сжатие ответов (api.middleware.CompressionMiddleware): brotli, если установлен
+# (requirements-optional.txt), иначе gzip
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = 5
 
 
 # Password validation
@@ -0,0 +1,115 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+
+from .authentication import StatelessJWTAuthentication
+from .cache import aget_basket_summary, aget_category_tree, aget_good_json
+from .filters import filter_goods, get_sparse_fields
+from .mixins import ConditionalGetMixin
+from .models import BasketItem, Good, GoodCategory
+from .pagination import GoodCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    GoodCategorySerializer, GoodListSerializer, GoodSerializer, build_category_tree, compiled_good_list,
+)
+from .views import basket_lines, basket_totals, render_basket_summary
+
+
+# Async-версии горячих GET-эндпоинтов для ASGI: ответы совпадают с синхронными,
+# но запрос не занимает поток, пока ждёт БД, кэш или медленного клиента
+class AsyncAPIView(ConditionalGetMixin, View):
+    authentication = StatelessJWTAuthentication()
+    requires_auth = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if self.requires_auth:
+                auth = await self.authentication.aauthenticate(request)
+                if auth is None:
+                    raise NotAuthenticated()
+                request.user, request.auth = auth
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(data, status=exc.status_code)
+
+# Тот же рендерер, что у DRF-представлений: тела ответов совпадают байт в байт
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncGoodListView(AsyncAPIView):
+    # Только пагинация по курсору: для номеров страниц нужен COUNT(*)
+    async def get(self, request):
+        params = Request(request)
+        compiled = compiled_good_list.select(get_sparse_fields(params.query_params, GoodListSerializer.Meta.fields))
+        goods = filter_goods(Good.objects.all(), params.query_params)
+        goods = goods.only(*compiled.columns, 'created_at', 'updated_at', 'price')
+        paginator = GoodCursorPagination()
+        results = await paginator.apaginate_queryset(goods, params)
+        etag, last_modified = self.get_rows_validators(request, results, paginator.next_cursor)
+        return self.conditional_response(request, etag, last_modified, lambda: json_response({
+            'approxTotalCount': paginator.total_count,
+            'nextCursor': paginator.next_cursor,
+            'prevCursor': paginator.prev_cursor,
+            'items': compiled.from_instances(results),
+        }))
+
+class AsyncGoodDetailView(AsyncAPIView):
+    async def get(self, request, id):
+        async def build():
+            try:
+                good = await Good.objects.aget(id=id)
+            except Good.DoesNotExist:
+                # Как у get_object_or_404 в синхронном представлении
+                raise NotFound('No Good matches the given query.')
+            return good.updated_at, GoodSerializer(good).data
+
+        last_modified, body = await aget_good_json(id, build)
+        etag = self.make_etag(request, last_modified.isoformat())
+        return self.conditional_response(
+            request, etag, last_modified, lambda: HttpResponse(body, content_type='application/json')
+        )
+
+class AsyncGoodCategoryTreeView(AsyncAPIView):
+    async def get(self, request):
+        async def build():
+            return build_category_tree([category async for category in GoodCategory.objects.order_by('path')])
+
+        version, body = await aget_category_tree(build)
+        etag = f'"{version}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+class AsyncGoodCategoryDetailView(AsyncAPIView):
+    async def get(self, request, id):
+        try:
+            category = await GoodCategory.objects.aget(id=id)
+        except GoodCategory.DoesNotExist:
+            return json_response({'error': 'Category not found.'}, status=404)
+        # Тот же ETag, что у синхронного представления: MAX(updated_at) и COUNT по одной строке
+        etag = self.make_etag(request, category.updated_at.isoformat(), 1)
+        return self.conditional_response(
+            request, etag, category.updated_at, lambda: json_response(GoodCategorySerializer(category).data)
+        )
+
+class AsyncBasketItemsView(AsyncAPIView):
+    requires_auth = True
+    etag_per_user = True
+
+    async def get(self, request):
+        user_id = request.user.pk
+
+        async def build():
+            basket_items = BasketItem.objects.filter(user_id=user_id)
+            totals = await basket_items.aaggregate(**basket_totals())
+            return render_basket_summary(totals, [item async for item in basket_lines(basket_items)])
+
+        last_modified, data = await aget_basket_summary(user_id, build)
+        etag = self.make_etag(request, last_modified and last_modified.isoformat(), data['totalCount'], data['totalPrice'])
+        return self.conditional_response(request, etag, last_modified, lambda: json_response(data))
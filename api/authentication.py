@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import is_shared_cache
+
+
+def revoked_cache_key(user_id):
+    return f'auth:revoked:{user_id}'
+
+def active_cache_key(user_id):
+    return f'auth:active:{user_id}'
+
+def revoke_user(user_id):
+    # Ключ живёт столько же, сколько access-токен: дольше старые токены не проходят сами
+    cache.set(revoked_cache_key(user_id), True, timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()))
+    cache.delete(active_cache_key(user_id))
+
+def restore_user(user_id):
+    cache.delete_many([revoked_cache_key(user_id), active_cache_key(user_id)])
+
+def tokens_for_user(user):
+    # Данные пользователя кладутся в claims, чтобы запросы обходились без чтения User
+    refresh = RefreshToken.for_user(user)
+    refresh['email'] = user.email
+    refresh['is_active'] = user.is_active
+    refresh['is_staff'] = user.is_staff
+    return refresh
+
+
+# Пользователь из claims токена; модель User загружается только при обращении
+# к полю, которого нет в токене, или через .instance
+class LazyTokenUser(TokenUser):
+    @cached_property
+    def instance(self):
+        from .models import User
+
+        return User.objects.get(pk=self.pk)
+
+    @property
+    def email(self):
+        if 'email' in self.token:
+            return self.token['email']
+        return self.instance.email
+
+    @property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.instance, attr)
+
+
+# Без общего кэша список отзывов работает только внутри процесса, поэтому is_active
+# дополнительно читается из БД; результат кэшируется на AUTH_ACTIVE_CHECK_TTL секунд
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        self.check_user(user, self.is_revoked(user.pk))
+        return user
+
+    def check_user(self, user, revoked):
+        if not user.is_active or revoked:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+    def is_revoked(self, user_id):
+        revoked = cache.get(revoked_cache_key(user_id))
+        if revoked or is_shared_cache(caches['default']):
+            return revoked
+        active = cache.get(active_cache_key(user_id))
+        if active is None:
+            from .models import User
+
+            active = User.objects.filter(pk=user_id, is_active=True).exists()
+            cache.set(active_cache_key(user_id), active, timeout=settings.AUTH_ACTIVE_CHECK_TTL)
+        return not active
+
+    async def ais_revoked(self, user_id):
+        revoked = await cache.aget(revoked_cache_key(user_id))
+        if revoked or is_shared_cache(caches['default']):
+            return revoked
+        active = await cache.aget(active_cache_key(user_id))
+        if active is None:
+            from .models import User
+
+            active = await User.objects.filter(pk=user_id, is_active=True).aexists()
+            await cache.aset(active_cache_key(user_id), active, timeout=settings.AUTH_ACTIVE_CHECK_TTL)
+        return not active
+
+    # Для async-представлений: разбор токена не требует ввода-вывода, кэш читается через aget
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = JWTStatelessUserAuthentication.get_user(self, validated_token)
+        self.check_user(user, await self.ais_revoked(user.pk))
+        return user, validated_token
@@ -0,0 +1,289 @@
+import bisect
+import logging
+import re
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connections
+
+from .cache import is_shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+GOOD = 0
+CATEGORY = 1
+KINDS = {GOOD: 'good', CATEGORY: 'category'}
+
+MAX_ENTRIES = getattr(settings, 'AUTOCOMPLETE_MAX_ENTRIES', 5_000_000)
+MAX_WORD_LENGTH = 32
+# Правки после сборки копятся в небольшом массиве; когда он дорастает до доли основного,
+# индекс пересобирается в фоне
+COMPACT_MIN_ENTRIES = 10_000
+COMPACT_RATIO = 0.01
+
+VERSION_KEY = 'autocomplete:version'
+VERSION_CHECK_INTERVAL = getattr(settings, 'AUTOCOMPLETE_VERSION_CHECK_INTERVAL', 1)
+# Не чаще раза в столько секунд пересобираем из-за правок других процессов
+REBUILD_INTERVAL = getattr(settings, 'AUTOCOMPLETE_REBUILD_INTERVAL', 30)
+# Без общего кэша версии других процессов не видно — индекс пересобирается по возрасту
+MAX_AGE = getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300)
+
+
+def title_words(title):
+    return {word[:MAX_WORD_LENGTH] for word in re.findall(r'\w+', title.lower())}
+
+def _prefix_range(words, prefix):
+    start = bisect.bisect_left(words, prefix)
+    end = bisect.bisect_left(words, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+    return start, end
+
+
+# Отсортированный массив слов из названий: каждое слово указывает на
+# ref = id * 2 + kind. Поиск по префиксу — bisect по массиву слов.
+# Основной массив после build() не меняется: новые слова попадают в отдельный
+# небольшой отсортированный массив, а записи изменённых ref в основном пропускаются
+class PrefixIndex:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.words = []
+        self.refs = array('q')
+        self.added_words = []
+        self.added_refs = array('q')
+        self.replaced = set()
+        self.titles = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.version = None
+        self.built_at = 0
+        self.checked_at = 0
+        self._changes = None
+
+    def build(self, items, version=None):
+        # Правки, пришедшие во время сборки, повторяются на новом индексе
+        with self.lock:
+            self._changes = []
+        try:
+            words = []
+            refs = []
+            titles = {}
+            for kind, pk, title in items:
+                ref = pk * 2 + kind
+                title_keys = title_words(title)
+                if len(words) + len(title_keys) > self.max_entries:
+                    logger.warning('Autocomplete index is full, %s titles indexed', len(titles))
+                    break
+                titles[ref] = title
+                words.extend(title_keys)
+                refs.extend([ref] * len(title_keys))
+
+            order = sorted(range(len(words)), key=words.__getitem__)
+            interned = {}
+            words = [interned.setdefault(words[i], words[i]) for i in order]
+            refs = array('q', (refs[i] for i in order))
+        except BaseException:
+            with self.lock:
+                self._changes = None
+            raise
+
+        with self.lock:
+            self.words, self.refs, self.titles = words, refs, titles
+            self.added_words, self.added_refs, self.replaced = [], array('q'), set()
+            changes, self._changes = self._changes, None
+            for change in changes:
+                self._apply(*change)
+            self.loaded = True
+            self.version = version
+            self.built_at = self.checked_at = time.monotonic()
+
+    def _remove(self, ref):
+        title = self.titles.pop(ref, None)
+        if title is None:
+            return
+        self.replaced.add(ref)
+        for word in title_words(title):
+            index = bisect.bisect_left(self.added_words, word)
+            while index < len(self.added_words) and self.added_words[index] == word:
+                if self.added_refs[index] == ref:
+                    del self.added_words[index]
+                    del self.added_refs[index]
+                    break
+                index += 1
+
+    def _apply(self, ref, title):
+        self._remove(ref)
+        if title is None:
+            return
+        words = title_words(title)
+        if len(self.words) + len(self.added_words) + len(words) > self.max_entries:
+            return
+        self.titles[ref] = title
+        for word in words:
+            index = bisect.bisect_right(self.added_words, word)
+            self.added_words.insert(index, word)
+            self.added_refs.insert(index, ref)
+
+    def update(self, kind, pk, title):
+        with self.lock:
+            self._apply(pk * 2 + kind, title)
+            if self._changes is not None:
+                self._changes.append((pk * 2 + kind, title))
+
+    def remove(self, kind, pk):
+        self.update(kind, pk, None)
+
+    def needs_compaction(self):
+        return len(self.added_words) > max(COMPACT_MIN_ENTRIES, len(self.words) * COMPACT_RATIO)
+
+    def _refs(self, prefix):
+        # ref обоих массивов в порядке слов
+        start, end = _prefix_range(self.words, prefix)
+        added_start, added_end = _prefix_range(self.added_words, prefix)
+        while start < end or added_start < added_end:
+            if added_start == added_end or (start < end and self.words[start] <= self.added_words[added_start]):
+                ref = self.refs[start]
+                start += 1
+                if ref in self.replaced:
+                    continue
+            else:
+                ref = self.added_refs[added_start]
+                added_start += 1
+            yield ref
+
+    def _range_size(self, prefix):
+        start, end = _prefix_range(self.words, prefix)
+        added_start, added_end = _prefix_range(self.added_words, prefix)
+        return end - start + added_end - added_start
+
+    def complete(self, query, limit=10):
+        terms = list(dict.fromkeys(term[:MAX_WORD_LENGTH] for term in re.findall(r'\w+', query.lower())))
+        if not terms:
+            return []
+
+        results = []
+        seen = set()
+        with self.lock:
+            # Каждое слово запроса — префикс какого-то слова названия. Обходим самый узкий
+            # диапазон целиком, остальные слова проверяем по названию
+            scanned = min(terms, key=self._range_size)
+            others = [re.compile(r'(?<!\w)' + re.escape(term)) for term in terms if term != scanned]
+            for ref in self._refs(scanned):
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                title = self.titles[ref]
+                if others:
+                    lowered = title.lower()
+                    if not all(pattern.search(lowered) for pattern in others):
+                        continue
+                results.append({'type': KINDS[ref & 1], 'id': ref >> 1, 'title': title})
+                if len(results) >= limit:
+                    break
+        return results
+
+
+index = PrefixIndex()
+_build_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+_rebuild_pending = False
+
+
+# Общий для процессов счётчик правок каталога: индекс процесса, собранный при другой
+# версии, устарел. Начальное значение в миллисекундах: incr django-redis теряет точность
+# на числах больше 2**53
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        return None
+
+def _load_titles():
+    from .models import Good, GoodCategory
+
+    for pk, title in GoodCategory.objects.values_list('id', 'title').iterator(chunk_size=5000):
+        yield CATEGORY, pk, title
+    for pk, title in Good.objects.values_list('id', 'title').iterator(chunk_size=5000):
+        yield GOOD, pk, title
+
+def _build():
+    # Версия читается до чтения БД: правки во время сборки снова сделают индекс устаревшим
+    index.build(_load_titles(), get_version())
+
+def _rebuild():
+    global _rebuild_pending
+    try:
+        with _build_lock:
+            with _rebuild_lock:
+                _rebuild_pending = False
+            _build()
+    except Exception:
+        logger.exception('Autocomplete index rebuild failed')
+    finally:
+        connections.close_all()
+
+def rebuild_in_background():
+    # Новый индекс строится в отдельном потоке, а запросы до подмены обслуживает старый
+    # (build() меняет массивы целиком). Незагруженный индекс соберётся сам при первом запросе
+    global _rebuild_pending
+    if not index.loaded:
+        return
+    with _rebuild_lock:
+        if _rebuild_pending:
+            return
+        _rebuild_pending = True
+    threading.Thread(target=_rebuild, name='autocomplete-rebuild', daemon=True).start()
+
+def _after_change():
+    version = bump_version()
+    # Своя правка уже в индексе; если версия ушла дальше, правили и другие процессы
+    if version is not None and index.version == version - 1:
+        index.version = version
+    if index.needs_compaction():
+        rebuild_in_background()
+
+def update(kind, pk, title):
+    if index.loaded:
+        index.update(kind, pk, title)
+    _after_change()
+
+def remove(kind, pk):
+    if index.loaded:
+        index.remove(kind, pk)
+    _after_change()
+
+def invalidate():
+    # Массовые изменения (импорт): индекс пересобирают все процессы
+    bump_version()
+    rebuild_in_background()
+
+def _check_freshness():
+    now = time.monotonic()
+    if now - index.checked_at < VERSION_CHECK_INTERVAL:
+        return
+    index.checked_at = now
+    if is_shared_cache(caches['default']):
+        stale = now - index.built_at >= REBUILD_INTERVAL and get_version() != index.version
+    else:
+        stale = now - index.built_at >= MAX_AGE
+    if stale:
+        rebuild_in_background()
+
+def complete(query, limit=10):
+    if not index.loaded:
+        with _build_lock:
+            if not index.loaded:
+                _build()
+    else:
+        _check_freshness()
+    return index.complete(query, limit)
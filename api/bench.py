@@ -0,0 +1,46 @@
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+# Общие помощники для команд bench_*
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def format_latencies(samples, unit='us'):
+    # samples в секундах
+    scale = {'us': 1_000_000, 'ms': 1000}[unit]
+    parts = [
+        f'{name} {percentile(samples, fraction) * scale:.1f} {unit}'
+        for name, fraction in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]
+    ]
+    parts.append(f'max {max(samples) * scale:.1f} {unit}')
+    return ', '.join(parts)
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+@contextmanager
+def scratch_database(alias='default', keepdb=False):
+    # Бенчмарки, которые пишут в БД, работают в отдельной тестовой базе (test_<NAME>),
+    # рабочие данные не трогаются. Для многопоточных замеров нужен PostgreSQL
+    # или SQLite с файлом в DATABASES[...]['TEST']['NAME']
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
@@ -0,0 +1,229 @@
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Max
+from .renderers import FastJSONRenderer
+
+
+def is_shared_cache(backend):
+    # LocMem у каждого процесса свой: записанное одним воркером другие не увидят
+    return not isinstance(backend, (LocMemCache, DummyCache))
+
+
+CATEGORY_TREE_VERSION_KEY = 'good_category_tree:version'
+CATEGORY_TREE_DB_VERSION_KEY = 'good_category_tree:db_version'
+CATEGORY_TREE_TIMEOUT = 60 * 60 * 24
+
+_category_tree_local = {}
+_category_tree_lock = threading.Lock()
+
+
+def _category_tree_stats():
+    from .models import GoodCategory
+
+    return GoodCategory.objects.all(), {'count': Count('pk'), 'updated': Max('updated_at')}
+
+def _category_tree_db_version(stats):
+    updated = stats['updated']
+    return f"db-{stats['count']}-{int(updated.timestamp() * 1_000_000) if updated else 0}"
+
+# Без общего кэша счётчик версии другим процессам не виден: версия берётся из самой
+# таблицы категорий (COUNT и MAX(updated_at)) и перечитывается не реже раза в
+# CATEGORY_TREE_CHECK_TTL секунд
+def get_category_tree_version():
+    if not is_shared_cache(caches['default']):
+        version = cache.get(CATEGORY_TREE_DB_VERSION_KEY)
+        if version is None:
+            categories, stats = _category_tree_stats()
+            version = _category_tree_db_version(categories.aggregate(**stats))
+            cache.set(CATEGORY_TREE_DB_VERSION_KEY, version, timeout=settings.CATEGORY_TREE_CHECK_TTL)
+        return version
+
+    version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    if version is None:
+        # Если ключ вытеснен, начинаем с метки времени, чтобы не совпасть со старыми ETag
+        cache.add(CATEGORY_TREE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    return version
+
+def bump_category_tree_version():
+    # Свой процесс видит правку сразу, остальные — через CATEGORY_TREE_CHECK_TTL
+    cache.delete(CATEGORY_TREE_DB_VERSION_KEY)
+    try:
+        cache.incr(CATEGORY_TREE_VERSION_KEY)
+    except ValueError:
+        cache.set(CATEGORY_TREE_VERSION_KEY, time.time_ns(), timeout=None)
+
+# Дерево ищется в памяти процесса, затем в общем кэше, и только потом строится из БД
+def get_category_tree(build):
+    version = get_category_tree_version()
+    body = _category_tree_local.get(version)
+    if body is not None:
+        return version, body
+
+    key = f'good_category_tree:{version}'
+    body = cache.get(key)
+    if body is None:
+        body = FastJSONRenderer().render(build())
+        cache.set(key, body, timeout=CATEGORY_TREE_TIMEOUT)
+
+    with _category_tree_lock:
+        _category_tree_local.clear()
+        _category_tree_local[version] = body
+    return version, body
+
+async def aget_category_tree_version():
+    if not is_shared_cache(caches['default']):
+        version = await cache.aget(CATEGORY_TREE_DB_VERSION_KEY)
+        if version is None:
+            categories, stats = _category_tree_stats()
+            version = _category_tree_db_version(await categories.aaggregate(**stats))
+            await cache.aset(CATEGORY_TREE_DB_VERSION_KEY, version, timeout=settings.CATEGORY_TREE_CHECK_TTL)
+        return version
+
+    version = await cache.aget(CATEGORY_TREE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATEGORY_TREE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(CATEGORY_TREE_VERSION_KEY)
+    return version
+
+async def aget_category_tree(build):
+    version = await aget_category_tree_version()
+    body = _category_tree_local.get(version)
+    if body is not None:
+        return version, body
+
+    key = f'good_category_tree:{version}'
+    body = await cache.aget(key)
+    if body is None:
+        body = FastJSONRenderer().render(await build())
+        await cache.aset(key, body, timeout=CATEGORY_TREE_TIMEOUT)
+
+    with _category_tree_lock:
+        _category_tree_local.clear()
+        _category_tree_local[version] = body
+    return version, body
+
+
+_flight_locks = {}
+_flight_guard = threading.Lock()
+
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+
+# Read-through с защитой от stampede: внутри процесса значение считает один поток,
+# между процессами — тот, кто захватил блокировку через cache.add()
+def get_or_compute(cache_backend, key, compute, timeout=DEFAULT_TIMEOUT):
+    value = cache_backend.get(key)
+    if value is not None:
+        return value
+
+    with _flight_guard:
+        lock = _flight_locks.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            value = cache_backend.get(key)
+            if value is not None:
+                return value
+
+            lock_key = f'{key}:lock'
+            if not cache_backend.add(lock_key, 1, timeout=SINGLE_FLIGHT_LOCK_TIMEOUT):
+                deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+                    value = cache_backend.get(key)
+                    if value is not None:
+                        return value
+                    if cache_backend.get(lock_key) is None:
+                        break
+            try:
+                value = compute()
+                cache_backend.set(key, value, timeout=timeout)
+            finally:
+                cache_backend.delete(lock_key)
+            return value
+        finally:
+            with _flight_guard:
+                _flight_locks.pop(key, None)
+
+_flight_tasks = {}
+
+
+# То же для async-представлений: внутри процесса ждём общую задачу вместо потока
+async def aget_or_compute(cache_backend, key, compute, timeout=DEFAULT_TIMEOUT):
+    value = await cache_backend.aget(key)
+    if value is not None:
+        return value
+
+    task = _flight_tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_acompute(cache_backend, key, compute, timeout))
+        _flight_tasks[key] = task
+        task.add_done_callback(lambda _: _flight_tasks.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _acompute(cache_backend, key, compute, timeout):
+    lock_key = f'{key}:lock'
+    if not await cache_backend.aadd(lock_key, 1, timeout=SINGLE_FLIGHT_LOCK_TIMEOUT):
+        deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            value = await cache_backend.aget(key)
+            if value is not None:
+                return value
+            if await cache_backend.aget(lock_key) is None:
+                break
+    try:
+        value = await compute()
+        await cache_backend.aset(key, value, timeout=timeout)
+    finally:
+        await cache_backend.adelete(lock_key)
+    return value
+
+def good_cache():
+    return caches[getattr(settings, 'GOOD_CACHE_ALIAS', 'default')]
+
+def good_cache_key(good_id):
+    return f'good:{good_id}:json'
+
+# build() возвращает (updated_at, data); в кэше лежит (updated_at, JSON-байты)
+def get_good_json(good_id, build):
+    def compute():
+        updated_at, data = build()
+        return updated_at, FastJSONRenderer().render(data)
+    return get_or_compute(good_cache(), good_cache_key(good_id), compute)
+
+async def aget_good_json(good_id, build):
+    async def compute():
+        updated_at, data = await build()
+        return updated_at, FastJSONRenderer().render(data)
+    return await aget_or_compute(good_cache(), good_cache_key(good_id), compute)
+
+def invalidate_good(good_id):
+    good_cache().delete(good_cache_key(good_id))
+
+BASKET_SUMMARY_TIMEOUT = 60 * 10
+
+
+def basket_cache_key(user_id):
+    return f'basket:{user_id}:summary'
+
+def get_basket_summary(user_id, build):
+    return get_or_compute(cache, basket_cache_key(user_id), build, timeout=BASKET_SUMMARY_TIMEOUT)
+
+async def aget_basket_summary(user_id, build):
+    return await aget_or_compute(cache, basket_cache_key(user_id), build, timeout=BASKET_SUMMARY_TIMEOUT)
+
+def invalidate_baskets(user_ids):
+    keys = [basket_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import autocomplete
+from .models import Good, GoodCategory
+
+
+FORMATS = ('csv', 'jsonl')
+IMPORT_FIELDS = ['title', 'description', 'price', 'seller_id', 'category_id']
+EXPORT_FIELDS = ['id', *IMPORT_FIELDS, 'created_at', 'updated_at']
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(name, default='csv'):
+    for fmt in FORMATS:
+        if name.lower().endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+def read_rows(stream, fmt):
+    # stream — текстовый поток; строки читаются по одной, файл целиком в память не грузится
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            # Цены как Decimal: float 3.3 не проходит проверку decimal_places у DecimalField
+            row = json.loads(line, parse_float=Decimal)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {}
+
+
+class GoodImporter:
+    def __init__(self, batch_size=1000, use_copy=None, using='default'):
+        self.batch_size = batch_size
+        self.using = using
+        connection = connections[using]
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.fields = {name: Good._meta.get_field(name) for name in IMPORT_FIELDS}
+        # Проверка FK через field.clean делает запрос на каждую строку — вместо неё множество id
+        self.fields['category_id'] = Good._meta.get_field('category').target_field
+        self.category_ids = set(GoodCategory.objects.using(using).values_list('id', flat=True))
+
+    def clean(self, row):
+        values = {}
+        errors = {}
+        for name, field in self.fields.items():
+            try:
+                values[name] = field.clean(row.get(name), None)
+            except ValidationError as error:
+                errors[name] = error.messages
+        if 'category_id' in values and values['category_id'] not in self.category_ids:
+            errors['category_id'] = ['Category does not exist.']
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def run(self, rows):
+        started = time.monotonic()
+        created = 0
+        errors = []
+        error_count = 0
+        batch = []
+        for line, row in enumerate(rows, start=1):
+            try:
+                batch.append(self.clean(row))
+            except ValidationError as error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line, 'errors': error.message_dict})
+                continue
+            if len(batch) >= self.batch_size:
+                created += self.write(batch)
+                batch = []
+        if batch:
+            created += self.write(batch)
+
+        if created:
+            # Пересборка индексов подсказок в фоне: запрос к autocomplete её не ждёт
+            transaction.on_commit(autocomplete.invalidate, using=self.using)
+        elapsed = time.monotonic() - started
+        return {
+            'created': created,
+            'errorCount': error_count,
+            'errors': errors,
+            'seconds': round(elapsed, 3),
+            'rowsPerSecond': round(created / elapsed) if elapsed else created,
+        }
+
+    def write(self, batch):
+        with transaction.atomic(using=self.using):
+            if self.use_copy:
+                return self.copy(batch)
+            Good.objects.using(self.using).bulk_create([Good(**values) for values in batch], batch_size=self.batch_size)
+            return len(batch)
+
+    def copy(self, batch):
+        # COPY FROM STDIN через psycopg3: created_at/updated_at ставим сами, search_vector заполнит триггер
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(Good._meta.get_field(name).column) for name in [*IMPORT_FIELDS, 'created_at', 'updated_at'])
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            with cursor.copy(f'COPY {quote(Good._meta.db_table)} ({columns}) FROM STDIN') as copy:
+                for values in batch:
+                    copy.write_row([*(values[name] for name in IMPORT_FIELDS), now, now])
+        return len(batch)
+
+
+def import_goods(stream, fmt, **options):
+    return GoodImporter(**options).run(read_rows(stream, fmt))
+
+
+def export_goods(queryset, fmt, chunk_size=2000, ordering=('id',)):
+    # Генератор кусков текста для StreamingHttpResponse или файла
+    rows = queryset.order_by(*ordering).values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+    for count, row in enumerate(rows, start=1):
+        if writer:
+            writer.writerow(row)
+        else:
+            item = dict(zip(EXPORT_FIELDS, row))
+            item['price'] = str(item['price'])
+            item['created_at'] = item['created_at'].isoformat()
+            item['updated_at'] = item['updated_at'].isoformat()
+            buffer.write(json.dumps(item, ensure_ascii=False))
+            buffer.write('\n')
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,73 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Subquery
+from rest_framework.exceptions import ValidationError
+
+from .models import GoodCategory
+
+
+GOOD_ORDERINGS = ('created_at', '-created_at', 'price', '-price')
+DEFAULT_GOOD_ORDERING = '-created_at'
+
+
+def category_subtree_ids(category_id):
+    # Путь берётся подзапросом, а не отдельным запросом: queryset остаётся ленивым
+    # и годится для async-представлений. Нет категории — NULL и пустой результат
+    path = GoodCategory.objects.filter(id=category_id).values('path')[:1]
+    return GoodCategory.objects.filter(path__startswith=Subquery(path)).values('id')
+
+def _parse(params, name, parse, errors):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        errors[name] = 'A valid number is required.'
+        return None
+
+def _finite_decimal(value):
+    # Decimal('NaN') и Decimal('Infinity') разбираются, но DecimalField их не принимает
+    value = Decimal(value)
+    if not value.is_finite():
+        raise ValueError(value)
+    return value
+
+def filter_goods(queryset, params):
+    errors = {}
+    category = _parse(params, 'category', int, errors)
+    seller_id = _parse(params, 'seller_id', int, errors)
+    price_min = _parse(params, 'price_min', _finite_decimal, errors)
+    price_max = _parse(params, 'price_max', _finite_decimal, errors)
+    if errors:
+        raise ValidationError(errors)
+
+    if category is not None:
+        queryset = queryset.filter(category_id__in=category_subtree_ids(category))
+    if seller_id is not None:
+        queryset = queryset.filter(seller_id=seller_id)
+    if price_min is not None:
+        queryset = queryset.filter(price__gte=price_min)
+    if price_max is not None:
+        queryset = queryset.filter(price__lte=price_max)
+    return queryset
+
+def get_good_ordering(params):
+    ordering = params.get('ordering', DEFAULT_GOOD_ORDERING)
+    if ordering not in GOOD_ORDERINGS:
+        raise ValidationError({'ordering': f'Supported values: {", ".join(GOOD_ORDERINGS)}'})
+    return ordering
+
+def order_goods(queryset, params):
+    ordering = get_good_ordering(params)
+    return queryset.order_by(ordering, '-pk' if ordering.startswith('-') else 'pk')
+
+def get_sparse_fields(params, available):
+    # ?fields=id,title,price — подмножество полей ответа; None, если параметр не задан
+    value = params.get('fields')
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    if not fields or any(name not in available for name in fields):
+        raise ValidationError({'fields': f'Supported values: {", ".join(available)}'})
+    return fields
@@ -0,0 +1,62 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import autocomplete
+from api.bench import format_latencies, measure
+
+
+class Command(BaseCommand):
+    help = 'Measures autocomplete prefix-index build time and lookup latency on synthetic titles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--words-per-title', type=int, default=4)
+        parser.add_argument('--vocabulary', type=int, default=50_000)
+        parser.add_argument('--queries', type=int, default=20_000)
+        parser.add_argument('--max-prefix', type=int, default=4)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--updates', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+            for _ in range(options['vocabulary'])
+        ]
+
+        def titles():
+            for pk in range(1, options['titles'] + 1):
+                yield autocomplete.GOOD, pk, ' '.join(rng.choices(vocabulary, k=options['words_per_title']))
+
+        # Отдельный индекс без лимита: рабочий index процесса не трогаем
+        index = autocomplete.PrefixIndex(max_entries=options['titles'] * options['words_per_title'])
+        started = time.perf_counter()
+        index.build(titles())
+        build_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f'Indexed {len(index.titles)} titles ({len(index.words)} entries) in {build_seconds:.1f} s'
+        )
+
+        def prefix():
+            return rng.choice(vocabulary)[:rng.randint(1, options['max_prefix'])]
+
+        # 'ab' — только префикс; 'word ab' — префикс и целое слово, которое фильтрует найденное
+        for name, make_query in [
+            ('prefix', prefix),
+            ('word + prefix', lambda: f'{rng.choice(vocabulary)} {prefix()}'),
+        ]:
+            queries = iter([make_query() for _ in range(options['queries'])])
+            samples = measure(lambda: index.complete(next(queries), options['limit']), options['queries'])
+            self.stdout.write(f'{options["queries"]} "{name}" lookups: {format_latencies(samples)}')
+
+        # Правки после сборки: основной массив не сдвигается, слова идут в дополнительный
+        pks = iter(rng.sample(range(1, options['titles'] + 1), min(options['updates'], options['titles'])))
+        samples = measure(
+            lambda: index.update(autocomplete.GOOD, next(pks), ' '.join(rng.choices(vocabulary, k=options['words_per_title']))),
+            min(options['updates'], options['titles']),
+        )
+        self.stdout.write(f'{len(samples)} title updates: {format_latencies(samples)}')
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from api.bench import format_latencies, scratch_database
+from api.models import (
+    BasketItem, Checkout, DeliveryMethod, Good, GoodCategory, PaymentMethod, Recipient, Transaction, User,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures Checkout.objects.create_from_basket throughput from concurrent threads '
+        'in a scratch test database. Run against PostgreSQL for meaningful numbers; SQLite '
+        'serializes writers and needs OPTIONS transaction_mode=IMMEDIATE and a file TEST NAME'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--checkouts', type=int, default=200, help='Checkouts per thread')
+        parser.add_argument('--items', type=int, default=5, help='Basket lines per checkout')
+        parser.add_argument('--goods', type=int, default=100)
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        with scratch_database(keepdb=options['keepdb']):
+            self.run(options)
+
+    def run(self, options):
+        threads, per_thread, items = options['threads'], options['checkouts'], options['items']
+        category = GoodCategory.objects.create(title='Bench', description='')
+        goods = Good.objects.bulk_create([
+            Good(title=f'Good {number}', description='', price=10 + number, seller_id=1, category=category)
+            for number in range(options['goods'])
+        ])
+        payment_method = PaymentMethod.objects.create(title='Bench card', description='')
+        delivery_method = DeliveryMethod.objects.create(title='Bench courier', description='')
+
+        # Один пользователь на оформление: корзины заполняются заранее и в замер не входят
+        users = User.objects.bulk_create([
+            User(email=f'bench{number}@example.com') for number in range(threads * per_thread + 1)
+        ])
+        recipients = Recipient.objects.bulk_create([
+            Recipient(user=user, first_name='Bench', last_name='User', address='', zip_code='', phone='')
+            for user in users
+        ])
+        BasketItem.objects.bulk_create([
+            BasketItem(user=user, good=goods[(number + line) % len(goods)], count=line + 1)
+            for number, user in enumerate(users)
+            for line in range(items)
+        ], batch_size=5000)
+        jobs = [(user.pk, recipient.pk) for user, recipient in zip(users, recipients)]
+
+        def checkout(job):
+            user_id, recipient_id = job
+            return Checkout.objects.create_from_basket(user_id, recipient_id, payment_method.pk, delivery_method.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            checkout(jobs.pop())
+        self.stdout.write(f'Queries per checkout ({items} lines): {len(queries)}')
+
+        samples = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker(chunk):
+            local_samples, local_errors = [], []
+            barrier.wait()
+            try:
+                for job in chunk:
+                    started = time.perf_counter()
+                    try:
+                        checkout(job)
+                    except Exception as error:
+                        local_errors.append(error)
+                    else:
+                        local_samples.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+            with lock:
+                samples.extend(local_samples)
+                errors.extend(local_errors)
+
+        chunks = [jobs[number::threads] for number in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(worker, chunks))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{len(samples)} checkouts from {threads} threads in {elapsed:.2f} s: '
+            f'{len(samples) / elapsed:.0f} checkouts/s'
+        )
+        if samples:
+            self.stdout.write(f'Latency: {format_latencies(samples, "ms")}')
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{len(errors)} checkouts failed, first error: {errors[0]!r}'))
+
+        # Проверка результата: ни одной оставшейся строки корзины, по транзакции на оформление
+        self.stdout.write(
+            f'Checkouts {Checkout.objects.count()}, transactions {Transaction.objects.count()}, '
+            f'basket lines left {BasketItem.objects.count()}'
+        )
@@ -0,0 +1,56 @@
+import io
+import statistics
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.bench import measure
+from api.models import Good
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import GoodSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares FastJSONRenderer/FastJSONParser with the stdlib DRF classes on serialized goods'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10_000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'orjson: {"installed" if orjson is not None else "not installed, fast classes fall back to stdlib"}')
+        now = timezone.now()
+        for size in options['sizes']:
+            # Несохранённые объекты: сериализатор не обращается к БД
+            goods = [
+                Good(
+                    id=number, title=f'Товар {number} "quoted"', description='Описание ' * 10,
+                    price=Decimal(number) / 7, seller_id=number % 100, category_id=number % 20 + 1,
+                    created_at=now, updated_at=now,
+                )
+                for number in range(1, size + 1)
+            ]
+            data = GoodSerializer(goods, many=True).data
+
+            baseline = JSONRenderer().render(data)
+            fast = FastJSONRenderer().render(data)
+            if fast != baseline:
+                self.stdout.write(self.style.ERROR(f'{size} goods: rendered output differs from JSONRenderer'))
+
+            render = self.time(lambda: JSONRenderer().render(data), options['repeat'])
+            fast_render = self.time(lambda: FastJSONRenderer().render(data), options['repeat'])
+            parse = self.time(lambda: JSONParser().parse(io.BytesIO(baseline)), options['repeat'])
+            fast_parse = self.time(lambda: FastJSONParser().parse(io.BytesIO(baseline)), options['repeat'])
+            self.stdout.write(
+                f'{size} goods ({len(baseline) // 1024} KiB): '
+                f'render {render:.1f} -> {fast_render:.1f} ms ({render / fast_render:.1f}x), '
+                f'parse {parse:.1f} -> {fast_parse:.1f} ms ({parse / fast_parse:.1f}x)'
+            )
+
+    def time(self, func, repeat):
+        # Медиана в миллисекундах
+        return statistics.median(measure(func, repeat)) * 1000
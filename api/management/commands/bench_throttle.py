@@ -0,0 +1,52 @@
+import itertools
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.bench import format_latencies, measure, percentile
+from api.throttling import LoginEmailThrottle, LoginIPThrottle, store
+
+
+BUDGET = 100e-6
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request overhead of the auth token-bucket throttles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100_000)
+        parser.add_argument('--keys', type=int, default=10_000, help='Distinct emails and IPs cycled through')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for number in range(options['keys']):
+            request = Request(
+                factory.post('/api/auth/login/', {'email': f'user{number}@example.com'}, format='json',
+                             REMOTE_ADDR=f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'),
+                parsers=[JSONParser()],
+            )
+            request.data
+            requests.append(request)
+        cycle = itertools.cycle(requests)
+
+        # Как в APIView.check_throttles: новые экземпляры на каждый запрос
+        def check():
+            request = next(cycle)
+            for throttle_class in (LoginIPThrottle, LoginEmailThrottle):
+                throttle_class().allow_request(request, None)
+
+        # Настроенное хранилище (THROTTLE_STORE): с Redis замер включает сетевой запрос
+        keys = itertools.cycle(range(options['keys']))
+
+        def consume():
+            store.consume(f'bench:{next(keys)}', 5, 5 / 60)
+
+        self.stdout.write(f'Store: {type(store).__name__}')
+        for name, func in [('store consume', consume), ('login throttles (IP + email)', check)]:
+            measure(func, min(options['requests'], 10_000))
+            samples = measure(func, options['requests'])
+            verdict = 'OK' if percentile(samples, 0.99) < BUDGET else 'OVER BUDGET'
+            self.stdout.write(f'{name}: {format_latencies(samples)} [{verdict}, budget 100 us at p99]')
@@ -0,0 +1,30 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.catalog_io import FORMATS, detect_format, export_goods
+from api.filters import filter_goods
+from api.models import Good
+
+
+class Command(BaseCommand):
+    help = 'Exports goods to a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="File path, or '-' for stdout")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--category', help='Export only this category and its subcategories')
+        parser.add_argument('--seller-id')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        goods = filter_goods(Good.objects.all(), {'category': options['category'], 'seller_id': options['seller_id']})
+
+        stream = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+        try:
+            for chunk in export_goods(goods, fmt):
+                stream.write(chunk)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
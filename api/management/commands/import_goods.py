@@ -0,0 +1,35 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalog_io import FORMATS, detect_format, import_goods
+
+
+class Command(BaseCommand):
+    help = 'Imports goods from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File path, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create instead of PostgreSQL COPY')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        use_copy = False if options['no_copy'] else None
+        try:
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig') if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(error)
+
+        with stream:
+            result = import_goods(stream, fmt, batch_size=options['batch_size'], use_copy=use_copy)
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            f"Imported {result['created']} goods in {result['seconds']} s "
+            f"({result['rowsPerSecond']} rows/s), {result['errorCount']} rows rejected"
+        )
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bench import format_latencies
+
+
+HELP = '''Compares throughput of running HTTP servers, e.g. WSGI vs ASGI.
+
+Start both servers against the same database, then run the command:
+
+  gunicorn MarketHub.wsgi -w 4 -k gthread --threads 8 -b 127.0.0.1:8000
+  uvicorn MarketHub.asgi:application --workers 4 --port 8001
+  python manage.py loadtest \\
+      --target wsgi=http://127.0.0.1:8000/api/goods/?cursor= \\
+      --target asgi=http://127.0.0.1:8001/api/async/goods/ \\
+      --concurrency 200 --duration 30 --slow-clients 500
+
+Slow clients open connections and trickle request headers for the whole run,
+holding a server slot the way slow mobile clients do.'''
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed by server')
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            close = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status, close
+
+
+class Target:
+    def __init__(self, spec, headers):
+        name, _, url = spec.partition('=')
+        if not url:
+            raise CommandError(f'--target must look like name=url, got {spec!r}')
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise CommandError('Only plain http:// targets are supported')
+        self.name = name
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        lines = [f'GET {path} HTTP/1.1', f'Host: {parts.netloc}', 'Accept: application/json', *headers]
+        self.request = ('\r\n'.join(lines) + '\r\n\r\n').encode()
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    async def client(self, deadline):
+        reader = writer = None
+        while time.monotonic() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                started = time.perf_counter()
+                writer.write(self.request)
+                await writer.drain()
+                status, close = await read_response(reader)
+                self.latencies.append(time.perf_counter() - started)
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if close:
+                    writer.close()
+                    writer = None
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                self.errors += 1
+                if writer is not None:
+                    writer.close()
+                writer = None
+                await asyncio.sleep(0.01)
+        if writer is not None:
+            writer.close()
+
+    async def slow_client(self, deadline, interval):
+        # Заголовки по одному байту: запрос так и не завершается до конца замера
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            writer.write(self.request.split(b'\r\n')[0] + b'\r\n')
+            await writer.drain()
+            while time.monotonic() < deadline:
+                await asyncio.sleep(interval)
+                writer.write(b'X')
+                await writer.drain()
+            writer.close()
+        except OSError:
+            pass
+
+
+class Command(BaseCommand):
+    help = HELP
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        from argparse import RawDescriptionHelpFormatter
+
+        return super().create_parser(prog_name, subcommand, formatter_class=RawDescriptionHelpFormatter, **kwargs)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, help='name=http://host:port/path')
+        parser.add_argument('--concurrency', type=int, default=100, help='Keep-alive clients per target')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds per target')
+        parser.add_argument('--slow-clients', type=int, default=0)
+        parser.add_argument('--slow-interval', type=float, default=5, help='Seconds between header bytes')
+        parser.add_argument('--header', action='append', default=[], help="Extra header, e.g. 'Authorization: Bearer ...'")
+
+    def handle(self, *args, **options):
+        targets = [Target(spec, options['header']) for spec in options['target']]
+        # Цели по очереди, чтобы серверы не делили CPU машины во время замера
+        for target in targets:
+            asyncio.run(self.run_target(target, options))
+            self.report(target, options['duration'])
+
+    async def run_target(self, target, options):
+        deadline = time.monotonic() + options['duration']
+        slow = [
+            asyncio.create_task(target.slow_client(deadline, options['slow_interval']))
+            for _ in range(options['slow_clients'])
+        ]
+        await asyncio.sleep(0)
+        await asyncio.gather(*(target.client(deadline) for _ in range(options['concurrency'])))
+        await asyncio.gather(*slow)
+
+    def report(self, target, duration):
+        total = len(target.latencies)
+        statuses = ', '.join(f'{status}: {count}' for status, count in sorted(target.statuses.items()))
+        self.stdout.write(
+            f'{target.name}: {total} requests, {total / duration:.0f} req/s, '
+            f'errors {target.errors}, statuses {{{statuses}}}'
+        )
+        if total:
+            self.stdout.write(f'  latency: {format_latencies(target.latencies, "ms")}')
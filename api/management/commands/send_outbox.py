@@ -0,0 +1,106 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from api.models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--backoff', type=float, default=10, help='Base retry delay in seconds')
+        parser.add_argument('--max-backoff', type=float, default=3600)
+        parser.add_argument('--lease', type=float, default=300, help='Seconds a claimed batch stays hidden from other workers')
+        parser.add_argument('--poll-interval', type=float, default=1)
+        parser.add_argument('--once', action='store_true', help='Drain the outbox and exit')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.stopping = threading.Event()
+        threads = [
+            threading.Thread(target=self.work, name=f'outbox-{number}', daemon=True)
+            for number in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+
+    def work(self):
+        # Каждый воркер держит одно SMTP-соединение и переиспользует его между пачками
+        connection = get_connection()
+        lease = timedelta(seconds=self.options['lease'])
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                emails = OutboxEmail.objects.claim(self.options['batch_size'], lease)
+                if not emails:
+                    if self.options['once']:
+                        return
+                    self.stopping.wait(self.options['poll_interval'])
+                    continue
+                self.send_batch(connection, emails)
+        finally:
+            connection.close()
+            connections.close_all()
+
+    def send_batch(self, connection, emails):
+        sent = []
+        failed = []
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection,
+            )
+            try:
+                connection.open()
+                message.send()
+            except Exception as error:
+                logger.warning('Failed to send outbox email %s: %s', email.id, error)
+                # Соединение могло оборваться — следующее письмо откроет новое
+                connection.close()
+                failed.append((email, error))
+            else:
+                sent.append(email.id)
+
+        # Текст отправленного письма стирается: в нём может быть OTP-код открытым текстом
+        now = timezone.now()
+        if sent:
+            OutboxEmail.objects.filter(id__in=sent).update(
+                status=OutboxEmail.Status.SENT, sent_at=now, last_error='', message='',
+            )
+        for email, error in failed:
+            email.attempts += 1
+            email.last_error = str(error)
+            if email.attempts >= self.options['max_attempts']:
+                email.status = OutboxEmail.Status.FAILED
+                email.message = ''
+            else:
+                delay = min(self.options['backoff'] * 2 ** (email.attempts - 1), self.options['max_backoff'])
+                email.next_attempt_at = now + timedelta(seconds=delay)
+        if failed:
+            OutboxEmail.objects.bulk_update(
+                [email for email, _ in failed],
+                ['attempts', 'last_error', 'status', 'next_attempt_at', 'message'],
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import OTP
+from api.otp import OTP_TTL
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired OTP codes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - OTP_TTL
+        total = 0
+        # Удаляем пачками по индексу created_at, чтобы не держать длинные блокировки
+        while True:
+            ids = list(OTP.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            # Условие по created_at повторяется: код, перевыпущенный между запросами
+            # (upsert сохраняет id), уже свежий и удаляться не должен
+            deleted, _ = OTP.objects.filter(id__in=ids, created_at__lt=cutoff).delete()
+            total += deleted
+        self.stdout.write(f'Deleted {total} expired OTP codes')
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = 'Deletes sent and failed outbox emails older than --days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        finished = OutboxEmail.objects.filter(
+            Q(status=OutboxEmail.Status.SENT, sent_at__lt=cutoff)
+            | Q(status=OutboxEmail.Status.FAILED, created_at__lt=cutoff)
+        )
+        total = 0
+        # Пачками, как sweep_otps: без длинных блокировок на таблице очереди
+        while True:
+            ids = list(finished.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, _ = finished.filter(id__in=ids).delete()
+            total += deleted
+        self.stdout.write(f'Deleted {total} outbox emails')
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(header):
+    # 'gzip, br;q=0.8, deflate;q=0' -> {'gzip', 'br'}: кодировки с q=0 клиент не принимает
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if coding and quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+def brotli_sequence(sequence, quality):
+    # flush после каждого куска: потоковые ответы (feed, export) доходят до клиента по частям
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+async def abrotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# brotli, если пакет установлен и клиент его принимает, иначе gzip из GZipMiddleware.
+# Ответы меньше COMPRESSION_MIN_SIZE байт не сжимаются — выигрыш меньше затрат
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if brotli is None or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if 'br' not in accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = abrotli_sequence(response.streaming_content, self.brotli_quality)
+            else:
+                response.streaming_content = brotli_sequence(response.streaming_content, self.brotli_quality)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Как в GZipMiddleware: сжатый ответ получает слабый ETag, If-None-Match продолжает совпадать
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -9,6 +9,12 @@ class Migration(migrations.Migration):
         ('api', '0008_deliverymethod'),
     ]
 
+    # api.User создаётся здесь, а admin.0001 ссылается на AUTH_USER_MODEL: без этого
+    # migrate на чистой базе (в том числе тестовой) падает на admin.0001_initial
+    run_before = [
+        ('admin', '0001_initial'),
+    ]
+
     operations = [
         migrations.CreateModel(
             name='OTP',
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_rename_name_good_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['created_at', 'id'], name='good_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['price', 'id'], name='good_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_good_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['category', 'price', 'id'], name='good_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['seller_id', 'created_at', 'id'], name='good_seller_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    GoodCategory = apps.get_model('api', 'GoodCategory')
+    parents = dict(GoodCategory.objects.values_list('id', 'parent_id'))
+    positions = {}
+
+    def position(category_id, seen=()):
+        if category_id not in positions:
+            parent_id = parents.get(category_id)
+            if parent_id is None or parent_id in seen:
+                positions[category_id] = (f'{category_id}/', 0)
+            else:
+                parent_path, parent_depth = position(parent_id, (*seen, category_id))
+                positions[category_id] = (f'{parent_path}{category_id}/', parent_depth + 1)
+        return positions[category_id]
+
+    categories = list(GoodCategory.objects.all())
+    for category in categories:
+        category.path, category.depth = position(category.id)
+    GoodCategory.objects.bulk_update(categories, ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_good_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goodcategory',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='goodcategory',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRESQL_FORWARDS = [
+    'CREATE INDEX good_search_vector_idx ON api_good USING gin (search_vector)',
+    '''
+    CREATE FUNCTION api_good_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER api_good_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON api_good
+    FOR EACH ROW EXECUTE FUNCTION api_good_search_vector_update()
+    ''',
+    'UPDATE api_good SET title = title',
+]
+
+POSTGRESQL_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS api_good_search_vector_trigger ON api_good',
+    'DROP FUNCTION IF EXISTS api_good_search_vector_update()',
+    'DROP INDEX IF EXISTS good_search_vector_idx',
+]
+
+# В SQLite вместо tsvector используется внешняя FTS5-таблица поверх api_good
+SQLITE_FORWARDS = [
+    '''
+    CREATE VIRTUAL TABLE api_good_fts USING fts5(
+        title, description, content='api_good', content_rowid='id'
+    )
+    ''',
+    '''
+    CREATE TRIGGER api_good_fts_insert AFTER INSERT ON api_good BEGIN
+        INSERT INTO api_good_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER api_good_fts_delete AFTER DELETE ON api_good BEGIN
+        INSERT INTO api_good_fts(api_good_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER api_good_fts_update AFTER UPDATE OF title, description ON api_good BEGIN
+        INSERT INTO api_good_fts(api_good_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO api_good_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    "INSERT INTO api_good_fts(api_good_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS api_good_fts_insert',
+    'DROP TRIGGER IF EXISTS api_good_fts_delete',
+    'DROP TRIGGER IF EXISTS api_good_fts_update',
+    'DROP TABLE IF EXISTS api_good_fts',
+]
+
+
+def run_vendor_sql(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgresql, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_goodcategory_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='good',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_vendor_sql(POSTGRESQL_FORWARDS, SQLITE_FORWARDS),
+            run_vendor_sql(POSTGRESQL_BACKWARDS, SQLITE_BACKWARDS),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_good_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkout',
+            index=models.Index(fields=['user', '-created_at'], name='checkout_user_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['checkout', 'status'], name='txn_checkout_status_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    BasketItem = apps.get_model('api', 'BasketItem')
+    Checkout = apps.get_model('api', 'Checkout')
+    duplicates = (
+        BasketItem.objects.values('user_id', 'good_id')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('count'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        extra = BasketItem.objects.filter(
+            user_id=duplicate['user_id'], good_id=duplicate['good_id'],
+        ).exclude(id=duplicate['keep_id'])
+        Checkout.objects.filter(basket__in=extra).update(basket_id=duplicate['keep_id'])
+        extra.delete()
+        BasketItem.objects.filter(id=duplicate['keep_id']).update(count=duplicate['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_checkout_transaction_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='basketitem',
+            constraint=models.UniqueConstraint(fields=('user', 'good'), name='basketitem_user_good_uniq'),
+        ),
+    ]
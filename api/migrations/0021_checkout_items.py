@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_basketitem_user_good_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkout',
+            name='basket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checkouts', to='api.basketitem'),
+        ),
+        migrations.CreateModel(
+            name='CheckoutItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('count', models.PositiveIntegerField()),
+                ('checkout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='api.checkout')),
+                ('good', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.good')),
+            ],
+        ),
+    ]
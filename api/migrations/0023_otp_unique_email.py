@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# Старые коды хранились открытым текстом и живут 5 минут — проще удалить их,
+# чем переносить: уникальность email иначе упрётся в дубликаты
+def delete_plain_codes(apps, schema_editor):
+    apps.get_model('api', 'OTP').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_outbox_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_plain_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='otp',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='otp',
+            field=models.CharField(max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_otp_unique_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['updated_at', 'id'], name='good_updated_at_id_idx'),
+        ),
+    ]
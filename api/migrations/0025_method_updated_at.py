@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_good_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverymethod',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='paymentmethod',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+# Уже отправленные и упавшие письма хранят OTP-коды открытым текстом
+def redact_finished(apps, schema_editor):
+    OutboxEmail = apps.get_model('api', 'OutboxEmail')
+    OutboxEmail.objects.filter(status__in=['SENT', 'FAILED']).exclude(message='').update(message='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_user_is_staff'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_finished, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_redact_outbox_messages'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='good',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='goods', to='api.goodcategory'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+# ETag/Last-Modified по updated_at: совпавший валидатор отдаёт 304 без сериализации
+class ConditionalGetMixin:
+    updated_field = 'updated_at'
+    # updated_at вложенных объектов (только прямые FK: JOIN не размножает строки) —
+    # их изменение тоже меняет ETag и Last-Modified
+    related_updated_fields = ()
+    # Для данных конкретного пользователя ETag зависит от него
+    etag_per_user = False
+
+    def make_etag(self, request, *parts):
+        if self.etag_per_user:
+            parts = (request.user.pk, *parts)
+        raw = ':'.join(str(part) for part in (request.get_full_path(), *parts))
+        return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+    def get_validators(self, request, queryset):
+        fields = (self.updated_field, *self.related_updated_fields)
+        state = queryset.order_by().aggregate(
+            *(Max(field) for field in fields),
+            count=Count('pk'),
+        )
+        stamps = [state[f'{field}__max'] for field in fields]
+        last_modified = max((stamp for stamp in stamps if stamp is not None), default=None)
+        etag = self.make_etag(request, *(stamp and stamp.isoformat() for stamp in stamps), state['count'])
+        return etag, last_modified
+
+    def get_rows_validators(self, request, rows, *parts):
+        stamps = [getattr(row, self.updated_field) for row in rows]
+        last_modified = max(stamps, default=None)
+        etag = self.make_etag(request, *parts, *((row.pk, stamp.isoformat()) for row, stamp in zip(rows, stamps)))
+        return etag, last_modified
+
+    def conditional_response(self, request, etag, last_modified, render):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def conditional_get(self, request, queryset, render):
+        etag, last_modified = self.get_validators(request, queryset)
+        return self.conditional_response(request, etag, last_modified, render)
+
+    # Для generics-представлений
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_get(request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return self.conditional_get(request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
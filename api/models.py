@@ -1,10 +1,16 @@
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
+from django.contrib.postgres.search import SearchVectorField
 
 from django.utils import timezone
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+from .cache import invalidate_baskets
+from .otp import OTP_TTL
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None):
@@ -18,6 +24,8 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser):
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
+    # Доступ к админским эндпоинтам (IsAdminUser): импорт каталога, получатели
+    is_staff = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     USERNAME_FIELD = 'email'
@@ -25,31 +33,140 @@ class User(AbstractBaseUser):
     objects = UserManager()
 
 class OTP(models.Model):
-    email = models.EmailField()
-    otp = models.CharField(max_length=6)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Одна активная запись на почту, в otp хранится HMAC кода (см. api/otp.py)
+    email = models.EmailField(unique=True)
+    otp = models.CharField(max_length=64)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     def is_valid(self):
-        return timezone.now() - self.created_at < timezone.timedelta(minutes=5)  # OTP действует 5 минут
+        return timezone.now() - self.created_at < OTP_TTL  # OTP действует 5 минут
     
+class OutboxEmailManager(models.Manager):
+    def enqueue(self, subject, message, recipient, from_email=None):
+        return self.create(
+            subject=subject,
+            message=message,
+            recipient=recipient,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        )
+
+    def claim(self, batch_size, lease):
+        # Забирает пачку писем, готовых к отправке, и откладывает их на время lease,
+        # чтобы параллельные воркеры не взяли те же строки
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            emails = self.filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+            if connections[self.db].features.has_select_for_update_skip_locked:
+                emails = emails.select_for_update(skip_locked=True)
+            emails = list(emails[:batch_size])
+            if emails:
+                self.filter(id__in=[email.id for email in emails]).update(next_attempt_at=now + lease)
+        return emails
+
+# Очередь исходящих писем: запрос только добавляет строку, отправляет команда send_outbox
+# (она же стирает message у отправленных), старые строки удаляет sweep_outbox
+class OutboxEmail(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        SENT = 'SENT', _('Sent')
+        FAILED = 'FAILED', _('Failed')
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
 class GoodCategory(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL)
+    # Материализованный путь вида "1/5/12/": поддерево выбирается по префиксу
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def get_ancestor_ids(self):
+        return [int(part) for part in self.path.split('/')[:-2]]
+
+    def _tree_position(self):
+        if self.parent_id is None:
+            return f'{self.pk}/', 0
+        parent = GoodCategory.objects.only('path', 'depth').get(pk=self.parent_id)
+        return f'{parent.path}{self.pk}/', parent.depth + 1
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'parent' not in update_fields:
+                return super().save(*args, **kwargs)
+            kwargs['update_fields'] = {*update_fields, 'path', 'depth'}
+
+        old_path, old_depth = self.path, self.depth
+        if self.pk is None:
+            super().save(*args, **kwargs)
+            self.path, self.depth = self._tree_position()
+            GoodCategory.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+            return
+
+        self.path, self.depth = self._tree_position()
+        super().save(*args, **kwargs)
+        if old_path and old_path != self.path:
+            GoodCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        # Дочерние категории становятся корневыми (parent -> NULL), их пути укорачиваются
+        if self.path:
+            GoodCategory.objects.filter(path__startswith=self.path).exclude(pk=self.pk).update(
+                path=Substr('path', len(self.path) + 1),
+                depth=F('depth') - (self.depth + 1),
+            )
+        return super().delete(*args, **kwargs)
+
 class Good(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     seller_id = models.BigIntegerField()
-    category = models.ForeignKey(GoodCategory, on_delete=models.CASCADE, related_name="goods")
+    # Отдельный индекс FK не нужен: category_id — первая колонка good_category_price_idx
+    category = models.ForeignKey(GoodCategory, on_delete=models.CASCADE, related_name="goods", db_index=False)
+    # Заполняется триггером БД (см. миграцию 0018), GIN-индекс создаётся там же
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='good_created_at_id_idx'),
+            models.Index(fields=['price', 'id'], name='good_price_id_idx'),
+            models.Index(fields=['category', 'price', 'id'], name='good_category_price_idx'),
+            models.Index(fields=['seller_id', 'created_at', 'id'], name='good_seller_created_at_idx'),
+            models.Index(fields=['updated_at', 'id'], name='good_updated_at_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -57,6 +174,7 @@ class PaymentMethod(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -65,6 +183,7 @@ class DeliveryMethod(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title   
@@ -88,6 +207,103 @@ class Recipient(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+class BasketItemManager(models.Manager):
+    def add(self, user_id, good_id, count):
+        # Добавляет count штук товара одним INSERT ... ON CONFLICT DO UPDATE.
+        # Возвращает None, если товара нет
+        connection = connections[self.db]
+        if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+            return self._upsert(connection, user_id, good_id, count)
+
+        with transaction.atomic(using=self.db):
+            if not Good.objects.using(self.db).filter(id=good_id).exists():
+                return None
+            items = self.filter(user_id=user_id, good_id=good_id)
+            invalidate_baskets([user_id])
+            if not items.update(count=F('count') + count, updated_at=timezone.now()):
+                try:
+                    with transaction.atomic(using=self.db):
+                        return self.create(user_id=user_id, good_id=good_id, count=count)
+                except IntegrityError:
+                    items.update(count=F('count') + count, updated_at=timezone.now())
+            return items.get()
+
+    def _upsert(self, connection, user_id, good_id, count):
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        # Явные типы нужны PostgreSQL при серверной подстановке параметров
+        if connection.vendor == 'postgresql':
+            int_param, timestamp_param = '%s::bigint', '%s::timestamptz'
+        else:
+            int_param, timestamp_param = '%s', '%s'
+        # INSERT ... SELECT из таблицы товаров: несуществующий товар просто не даст строки
+        sql = f"""
+            INSERT INTO {table} (user_id, good_id, count, created_at, updated_at)
+            SELECT {int_param}, id, {int_param}, {timestamp_param}, {timestamp_param}
+            FROM {quote(Good._meta.db_table)} WHERE id = %s
+            ON CONFLICT (user_id, good_id)
+            DO UPDATE SET count = {table}.count + excluded.count, updated_at = excluded.updated_at
+            RETURNING id, count
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, count, now, now, good_id])
+            row = cursor.fetchone()
+        invalidate_baskets([user_id])
+        if row is None:
+            return None
+        return self.model(id=row[0], user_id=user_id, good_id=good_id, count=row[1])
+
+    def apply_operations(self, user_id, operations):
+        # operations: [(good_id, op, count)], op — set/add/remove.
+        # Возвращает множество id несуществующих товаров — тогда корзина не меняется
+        good_ids = {good_id for good_id, _, _ in operations}
+        try:
+            return self._apply_operations(user_id, operations, good_ids)
+        except IntegrityError:
+            # Товар удалили между проверкой и записью: FK не дал закоммитить строку
+            missing = good_ids - set(Good.objects.using(self.db).filter(id__in=good_ids).values_list('id', flat=True))
+            if not missing:
+                raise
+            return missing
+
+    def _apply_operations(self, user_id, operations, good_ids):
+        with transaction.atomic(using=self.db):
+            missing = good_ids - set(Good.objects.using(self.db).filter(id__in=good_ids).values_list('id', flat=True))
+            if missing:
+                return missing
+            current = dict(
+                self.select_for_update()
+                .filter(user_id=user_id, good_id__in=good_ids)
+                .values_list('good_id', 'count')
+            )
+            counts = dict(current)
+            for good_id, op, count in operations:
+                if op == 'set':
+                    counts[good_id] = count
+                elif op == 'add':
+                    counts[good_id] = counts.get(good_id, 0) + count
+                else:
+                    counts[good_id] = 0
+
+            removed = [good_id for good_id, count in counts.items() if count == 0 and good_id in current]
+            changed = [
+                self.model(user_id=user_id, good_id=good_id, count=count)
+                for good_id, count in counts.items()
+                if count > 0 and current.get(good_id) != count
+            ]
+            invalidate_baskets([user_id])
+            if removed:
+                self.filter(user_id=user_id, good_id__in=removed).delete()
+            if changed:
+                self.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['user', 'good'],
+                    update_fields=['count', 'updated_at'],
+                )
+        return set()
+
 class BasketItem(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -99,22 +315,141 @@ class BasketItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BasketItemManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'good'], name='basketitem_user_good_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.good.name} (x{self.count})"
 
+RECIPIENT_READ_FIELDS = [
+    'id', 'user', 'first_name', 'last_name', 'middle_name', 'address', 'zip_code', 'phone',
+]
+
+def apply_read_plan(queryset, plan, fields=None):
+    # plan: поле сериализатора -> (пути для select_related, колонки для only());
+    # fields оставляет в JOIN и SELECT только запрошенное
+    names = list(plan) if fields is None else [name for name in plan if name in fields]
+    related = [path for name in names for path in plan[name][0]]
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only('id', *(column for name in names for column in plan[name][1]))
+
+METHOD_READ_COLUMNS = ['id', 'title', 'description']
+
+CHECKOUT_READ_PLAN = {
+    'id': ((), ['id']),
+    'user': ((), ['user']),
+    'recipient': (('recipient',), [f'recipient__{name}' for name in RECIPIENT_READ_FIELDS]),
+    'basket': (('basket__good',), [
+        'basket__id', 'basket__count', 'basket__good__id', 'basket__good__title', 'basket__good__price',
+    ]),
+    'items': ((), []),
+    'payment_method': (('payment_method',), [f'payment_method__{name}' for name in METHOD_READ_COLUMNS]),
+    'delivery_method': (('delivery_method',), [f'delivery_method__{name}' for name in METHOD_READ_COLUMNS]),
+    'payment_total': ((), ['payment_total']),
+    'created_at': ((), ['created_at']),
+    'updated_at': ((), ['updated_at']),
+}
+
+class CheckoutQuerySet(models.QuerySet):
+    def for_read(self, fields=None):
+        # Одним JOIN-запросом, без description/search_vector товара и служебных полей
+        queryset = apply_read_plan(self, CHECKOUT_READ_PLAN, fields)
+        if fields is None or 'items' in fields:
+            queryset = queryset.prefetch_related(
+                models.Prefetch('items', queryset=CheckoutItem.objects.order_by('id')),
+            )
+        return queryset
+
+    def create_from_basket(self, user_id, recipient_id, payment_method_id, delivery_method_id):
+        # Оформляет всю корзину пользователя одной транзакцией: строки корзины
+        # блокируются, цены фиксируются в CheckoutItem, корзина очищается.
+        # Возвращает (checkout, transaction) или None, если корзина пуста
+        with transaction.atomic(using=self.db):
+            basket_items = list(
+                BasketItem.objects.using(self.db)
+                .select_for_update(of=('self',))
+                .filter(user_id=user_id)
+                .order_by('id')
+                .values_list('id', 'good_id', 'count', 'good__title', 'good__price')
+            )
+            if not basket_items:
+                return None
+
+            checkout = self.create(
+                user_id=user_id,
+                recipient_id=recipient_id,
+                payment_method_id=payment_method_id,
+                delivery_method_id=delivery_method_id,
+                payment_total=0,
+            )
+            CheckoutItem.objects.using(self.db).bulk_create([
+                CheckoutItem(checkout=checkout, good_id=good_id, title=title, price=price, count=count)
+                for _, good_id, count, title, price in basket_items
+            ])
+            checkout.payment_total = CheckoutItem.objects.using(self.db).filter(checkout=checkout).aggregate(
+                total=Sum(ExpressionWrapper(F('count') * F('price'), output_field=DecimalField(max_digits=10, decimal_places=2))),
+            )['total']
+            checkout.save(update_fields=['payment_total', 'updated_at'])
+            payment = Transaction.objects.using(self.db).create(
+                checkout=checkout, amount=checkout.payment_total, status=Transaction.Status.PENDING,
+            )
+            BasketItem.objects.using(self.db).filter(id__in=[row[0] for row in basket_items]).delete()
+        return checkout, payment
+
 class Checkout(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="checkouts")
     recipient = models.ForeignKey('Recipient', on_delete=models.PROTECT, related_name="checkouts")
-    basket = models.ForeignKey('BasketItem', on_delete=models.PROTECT, related_name="checkouts")
+    basket = models.ForeignKey('BasketItem', null=True, blank=True, on_delete=models.SET_NULL, related_name="checkouts")
     payment_method = models.ForeignKey('PaymentMethod', on_delete=models.PROTECT, related_name="checkouts")
     delivery_method = models.ForeignKey('DeliveryMethod', on_delete=models.PROTECT, related_name="checkouts")
     payment_total = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CheckoutQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='checkout_user_created_at_idx'),
+        ]
+
     def __str__(self):
         return f"Checkout {self.id} by {self.user}"
 
+# Снимок позиции корзины на момент оформления: цена и название не меняются вместе с товаром
+class CheckoutItem(models.Model):
+    checkout = models.ForeignKey(Checkout, on_delete=models.CASCADE, related_name="items")
+    good = models.ForeignKey('Good', null=True, on_delete=models.SET_NULL, related_name="+")
+    title = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.title} (x{self.count})"
+
+TRANSACTION_READ_PLAN = {
+    'id': ((), ['id']),
+    'checkout': (('checkout__payment_method', 'checkout__delivery_method'), [
+        'checkout__id', 'checkout__payment_total', 'checkout__created_at',
+        *(f'checkout__payment_method__{name}' for name in METHOD_READ_COLUMNS),
+        *(f'checkout__delivery_method__{name}' for name in METHOD_READ_COLUMNS),
+    ]),
+    'created': ((), ['created']),
+    'updated': ((), ['updated']),
+    'status': ((), ['status']),
+    'amount': ((), ['amount']),
+    'provider_data': ((), ['provider_data']),
+}
+
+class TransactionQuerySet(models.QuerySet):
+    def for_read(self, fields=None):
+        return apply_read_plan(self, TRANSACTION_READ_PLAN, fields)
+
 class Transaction(models.Model):
     class Status(models.TextChoices):
         PENDING = 'PENDING', _('Pending')
@@ -128,5 +463,12 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     provider_data = models.JSONField(blank=True, null=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['checkout', 'status'], name='txn_checkout_status_idx'),
+        ]
+
     def __str__(self):
         return f"Transaction {self.id} - {self.status}"
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+OTP_TTL = timedelta(minutes=5)
+
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+
+
+def generate_code():
+    return str(secrets.randbelow(900000) + 100000)
+
+def hash_code(email, code):
+    # В хранилище лежит только HMAC от кода, привязанный к почте
+    key = settings.SECRET_KEY.encode()
+    return hmac.new(key, f'{email.lower()}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+# Одна активная запись на почту: новый код заменяет старый через upsert
+class DatabaseOTPStore:
+    def issue(self, email):
+        from .models import OTP
+
+        code = generate_code()
+        OTP.objects.bulk_create(
+            [OTP(email=email, otp=hash_code(email, code), created_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['email'],
+            update_fields=['otp', 'created_at'],
+        )
+        return code
+
+    def verify(self, email, code):
+        from .models import OTP
+
+        entry = OTP.objects.filter(email=email).only('id', 'otp', 'created_at').first()
+        if entry is None or not hmac.compare_digest(entry.otp, hash_code(email, code)):
+            return INVALID
+        # Удаляем по id и коду: повторный confirm тем же кодом не пройдёт
+        deleted, _ = OTP.objects.filter(id=entry.id, otp=entry.otp).delete()
+        if not deleted:
+            return INVALID
+        if not entry.is_valid():
+            return EXPIRED
+        return VALID
+
+
+# Коды только в кэше, истекают по TTL кэша — без запросов к БД
+class CacheOTPStore:
+    def key(self, email):
+        return f'otp:{email.lower()}'
+
+    def issue(self, email):
+        code = generate_code()
+        cache.set(self.key(email), hash_code(email, code), timeout=int(OTP_TTL.total_seconds()))
+        return code
+
+    def verify(self, email, code):
+        stored = cache.get(self.key(email))
+        if stored is None or not hmac.compare_digest(stored, hash_code(email, code)):
+            return INVALID
+        cache.delete(self.key(email))
+        return VALID
+
+
+STORES = {
+    'db': DatabaseOTPStore,
+    'cache': CacheOTPStore,
+}
+
+store = STORES[getattr(settings, 'OTP_STORE', 'db')]()
+
+
+def issue(email):
+    return store.issue(email)
+
+def verify(email, code):
+    return store.verify(email, str(code))
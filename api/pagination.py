@@ -0,0 +1,136 @@
+import base64
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+
+from .filters import GOOD_ORDERINGS, DEFAULT_GOOD_ORDERING
+
+
+def encode_cursor(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (TypeError, ValueError):
+        raise NotFound('Invalid cursor')
+    if not isinstance(payload, dict):
+        raise NotFound('Invalid cursor')
+    return payload
+
+def estimate_count(queryset):
+    # На PostgreSQL берём оценку планировщика вместо полного COUNT(*)
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+async def aestimate_count(queryset):
+    if connections[queryset.db].vendor != 'postgresql':
+        return await queryset.acount()
+    return await sync_to_async(estimate_count)(queryset)
+
+
+# Пагинация по ключу (field, id): страница читается из индекса с места,
+# где закончилась предыдущая, без OFFSET и COUNT(*)
+class KeysetPagination:
+    page_size = 50
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    orderings = ()
+    default_ordering = None
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        )
+
+    def get_position(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+            if ordering not in self.orderings:
+                raise ValidationError({'ordering': f'Supported values: {", ".join(self.orderings)}'})
+            return ordering, None, None, False
+
+        payload = decode_cursor(cursor)
+        ordering = payload.get('o')
+        if ordering not in self.orderings or 'v' not in payload or 'id' not in payload:
+            raise NotFound('Invalid cursor')
+        return ordering, payload['v'], payload['id'], bool(payload.get('r'))
+
+    def paginate_queryset(self, queryset, request):
+        page, pk, reverse = self.get_page_queryset(queryset, request)
+        self.total_count = estimate_count(queryset)
+        return self.get_page(list(page), pk, reverse)
+
+    async def apaginate_queryset(self, queryset, request):
+        page, pk, reverse = self.get_page_queryset(queryset, request)
+        self.total_count = await aestimate_count(queryset)
+        return self.get_page([row async for row in page], pk, reverse)
+
+    def get_page_queryset(self, queryset, request):
+        ordering, value, pk, reverse = self.get_position(request)
+        field_name = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        self.field = queryset.model._meta.get_field(field_name)
+        self.ordering = ordering
+
+        if pk is not None:
+            try:
+                value = self.field.to_python(value)
+                pk = int(pk)
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound('Invalid cursor')
+            lookup = 'lt' if descending != reverse else 'gt'
+            # Условие field >= v отдаёт планировщику диапазон по индексу,
+            # OR только уточняет границу среди совпадающих значений
+            queryset = queryset.filter(**{f'{field_name}__{lookup}e': value}).filter(
+                Q(**{f'{field_name}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk})
+            )
+
+        order_by = [field_name, 'pk'] if descending == reverse else [f'-{field_name}', '-pk']
+        return queryset.order_by(*order_by)[:self.page_size + 1], pk, reverse
+
+    def get_page(self, rows, pk, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else pk is not None
+        has_prev = has_more if reverse else pk is not None
+        self.next_cursor = self.make_cursor(rows[-1], False) if rows and has_next else None
+        self.prev_cursor = self.make_cursor(rows[0], True) if rows and has_prev else None
+        return rows
+
+    def make_cursor(self, instance, reverse):
+        payload = {'o': self.ordering, 'v': self.field.value_to_string(instance), 'id': instance.pk}
+        if reverse:
+            payload['r'] = 1
+        return encode_cursor(payload)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'approxTotalCount': self.total_count,
+            'nextCursor': self.next_cursor,
+            'prevCursor': self.prev_cursor,
+            'items': data,
+        })
+
+
+class GoodCursorPagination(KeysetPagination):
+    orderings = GOOD_ORDERINGS
+    default_ordering = DEFAULT_GOOD_ORDERING
@@ -0,0 +1,84 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import NotFound
+
+from .models import Good
+from .pagination import decode_cursor, encode_cursor
+
+
+SEARCH_PAGE_SIZE = 20
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+def _search_postgresql(terms, position, limit):
+    # Каждое слово ищется по префиксу ("iph:*"), чтобы поиск работал при наборе
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+    goods = Good.objects.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+    )
+    if position is not None:
+        rank, pk = position
+        goods = goods.filter(Q(rank__lt=rank) | Q(rank=rank, pk__gt=pk))
+    return [(good, good.rank) for good in goods.order_by('-rank', 'pk')[:limit]]
+
+def _search_sqlite(terms, position, limit):
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+    sql = (
+        'SELECT id, rank FROM ('
+        'SELECT rowid AS id, -bm25(api_good_fts, 10.0, 1.0) AS rank '
+        'FROM api_good_fts WHERE api_good_fts MATCH %s'
+        ')'
+    )
+    params = [match]
+    if position is not None:
+        sql += ' WHERE rank < %s OR (rank = %s AND id > %s)'
+        params += [position[0], position[0], position[1]]
+    sql += ' ORDER BY rank DESC, id LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = cursor.fetchall()
+    goods = Good.objects.in_bulk([pk for pk, _ in ranked])
+    return [(goods[pk], rank) for pk, rank in ranked if pk in goods]
+
+def _search_fallback(terms, position, limit):
+    goods = Good.objects.annotate(rank=Value(0.0, output_field=FloatField()))
+    for term in terms:
+        goods = goods.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    if position is not None:
+        goods = goods.filter(pk__gt=position[1])
+    return [(good, good.rank) for good in goods.order_by('pk')[:limit]]
+
+# Возвращает (goods, next_cursor); курсор хранит (rank, id) последнего товара страницы
+def search_goods(query, cursor=None, limit=SEARCH_PAGE_SIZE):
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+
+    position = None
+    if cursor:
+        payload = decode_cursor(cursor)
+        try:
+            position = (float(payload['rank']), int(payload['id']))
+        except (KeyError, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+    search = {
+        'postgresql': _search_postgresql,
+        'sqlite': _search_sqlite,
+    }.get(connection.vendor, _search_fallback)
+    results = search(terms, position, limit + 1)
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        good, rank = results[-1]
+        next_cursor = encode_cursor({'rank': rank, 'id': good.pk})
+    return [good for good, _ in results], next_cursor
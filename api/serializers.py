@@ -1,5 +1,16 @@
+from operator import attrgetter
+
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import GoodCategory, Good, PaymentMethod, DeliveryMethod, BasketItem, Checkout, Transaction, Recipient
+from .models import GoodCategory, Good, PaymentMethod, DeliveryMethod, BasketItem, Checkout, CheckoutItem, Transaction, Recipient
+
+# Serializer(..., fields=[...]) оставляет только перечисленные поля
+class SparseFieldsMixin:
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 class GoodCategorySerializer(serializers.ModelSerializer):
     parentId = serializers.PrimaryKeyRelatedField(queryset=GoodCategory.objects.all(), source='parent', allow_null=True)
@@ -8,6 +19,96 @@ class GoodCategorySerializer(serializers.ModelSerializer):
         model = GoodCategory
         fields = ['id', 'title', 'description', 'parentId']
 
+    def validate_parentId(self, parent):
+        if parent is not None and self.instance is not None and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('A category cannot be moved into its own subtree.')
+        return parent
+
+# Быстрый режим только для чтения: план полей строится один раз, строка превращается
+# в dict без обхода Field-объектов сериализатора. Вывод совпадает с serializer.data
+class CompiledSerializer:
+    # to_representation этих полей для значений из БД ничего не меняет
+    IDENTITY_FIELDS = (
+        serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField,
+    )
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        self.fields = fields
+        self.selected = {}
+
+    def select(self, fields):
+        # Та же схема, но только с полями из fields (?fields=...)
+        if fields is None:
+            return self
+        key = frozenset(fields)
+        if key not in self.selected:
+            self.selected[key] = CompiledSerializer(self.serializer_class, key)
+        return self.selected[key]
+
+    @cached_property
+    def plan(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (self.fields is not None and name not in self.fields):
+                continue
+            if field.source == '*' or isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                raise ValueError(f'{self.serializer_class.__name__}.{name} cannot be compiled')
+            path = field.source.split('.')
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                if field.pk_field is not None:
+                    raise ValueError(f'{self.serializer_class.__name__}.{name} cannot be compiled')
+                # Для внешнего ключа хватает значения колонки *_id
+                attname = model._meta.get_field(path[0]).attname if len(path) == 1 else f'{path[-1]}_id'
+                attribute = path[:-1] + [attname]
+                convert = None
+            else:
+                attribute = path
+                convert = None if isinstance(field, self.IDENTITY_FIELDS) else field.to_representation
+            plan.append((name, '__'.join(path), attrgetter('.'.join(attribute)), convert))
+        return plan
+
+    @cached_property
+    def columns(self):
+        return [column for _, column, _, _ in self.plan]
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def from_values(self, rows):
+        plan = [(name, convert) for name, _, _, convert in self.plan]
+        return [
+            {name: value if value is None or convert is None else convert(value) for (name, convert), value in zip(plan, row)}
+            for row in rows
+        ]
+
+    def from_instances(self, instances):
+        plan = [(name, getter, convert) for name, _, getter, convert in self.plan]
+        result = []
+        for instance in instances:
+            item = {}
+            for name, getter, convert in plan:
+                value = getter(instance)
+                item[name] = value if value is None or convert is None else convert(value)
+            result.append(item)
+        return result
+
+def build_category_tree(categories):
+    # Категории должны идти в порядке path: родитель всегда раньше потомков
+    nodes = {}
+    roots = []
+    for item in compiled_good_categories.from_instances(categories):
+        node = {**item, 'children': []}
+        nodes[node['id']] = node
+        parent = nodes.get(node['parentId'])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
 class GoodCategoriesListResponseSerializer(serializers.Serializer):
     totalCount = serializers.IntegerField()
     nextPage = serializers.CharField(allow_null=True)
@@ -24,6 +125,9 @@ class GoodListSerializer(serializers.ModelSerializer):
         model = Good
         fields = ['id', 'title', 'price', 'category']
 
+compiled_good_categories = CompiledSerializer(GoodCategorySerializer)
+compiled_good_list = CompiledSerializer(GoodListSerializer)
+
 class GoodListResponseSerializer(serializers.Serializer):
     totalCount = serializers.IntegerField()
     nextPage = serializers.CharField(allow_null=True)
@@ -54,16 +158,97 @@ class BasketItemSerializer(serializers.ModelSerializer):
         model = BasketItem
         fields = ['id', 'good', 'count']
 
+class BasketItemSummarySerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source='good.title', read_only=True)
+    price = serializers.DecimalField(source='good.price', max_digits=10, decimal_places=2, read_only=True)
+    lineTotal = serializers.DecimalField(source='line_total', max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = BasketItem
+        fields = ['id', 'good', 'count', 'title', 'price', 'lineTotal']
+
+class BasketSummarySerializer(serializers.Serializer):
+    totalCount = serializers.IntegerField()
+    totalQuantity = serializers.IntegerField()
+    totalPrice = serializers.DecimalField(max_digits=14, decimal_places=2)
+    items = BasketItemSummarySerializer(many=True)
+
 class AddToBasketSerializer(serializers.Serializer):
     goodId = serializers.IntegerField()
     count = serializers.IntegerField(min_value=1)
 
+class BasketOperationSerializer(serializers.Serializer):
+    goodId = serializers.IntegerField()
+    op = serializers.ChoiceField(choices=['set', 'add', 'remove'], default='add')
+    count = serializers.IntegerField(min_value=0, default=1)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'add' and attrs['count'] < 1:
+            raise serializers.ValidationError({'count': 'Ensure this value is greater than or equal to 1.'})
+        return attrs
+
+class BasketBatchSerializer(serializers.Serializer):
+    operations = BasketOperationSerializer(many=True, allow_empty=False, max_length=1000)
+
 class CheckoutSerializer(serializers.ModelSerializer):
     class Meta:
         model = Checkout
         fields = '__all__'
 
+class CheckoutFromBasketSerializer(serializers.Serializer):
+    recipientId = serializers.IntegerField()
+    paymentMethodId = serializers.IntegerField()
+    deliveryMethodId = serializers.IntegerField()
+
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
+
+# Сериализаторы для чтения: связанные объекты вложены, поэтому queryset
+# должен быть подготовлен через Checkout/Transaction.objects.for_read()
+class BasketItemGoodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Good
+        fields = ['id', 'title', 'price']
+
+class CheckoutBasketItemSerializer(serializers.ModelSerializer):
+    good = BasketItemGoodSerializer(read_only=True)
+
+    class Meta:
+        model = BasketItem
+        fields = ['id', 'good', 'count']
+
+class CheckoutItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CheckoutItem
+        fields = ['id', 'good', 'title', 'price', 'count']
+
+class CheckoutReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    recipient = RecipientSerializer(read_only=True)
+    basket = CheckoutBasketItemSerializer(read_only=True)
+    items = CheckoutItemSerializer(many=True, read_only=True)
+    payment_method = PaymentMethodSerializer(read_only=True)
+    delivery_method = DeliveryMethodSerializer(read_only=True)
+
+    class Meta:
+        model = Checkout
+        fields = [
+            'id', 'user', 'recipient', 'basket', 'items', 'payment_method', 'delivery_method',
+            'payment_total', 'created_at', 'updated_at',
+        ]
+
+class CheckoutSummarySerializer(serializers.ModelSerializer):
+    payment_method = PaymentMethodSerializer(read_only=True)
+    delivery_method = DeliveryMethodSerializer(read_only=True)
+
+    class Meta:
+        model = Checkout
+        fields = ['id', 'payment_method', 'delivery_method', 'payment_total', 'created_at']
+
+class TransactionReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    checkout = CheckoutSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Transaction
+        fields = ['id', 'checkout', 'created', 'updated', 'status', 'amount', 'provider_data']
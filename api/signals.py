@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import autocomplete
+from .authentication import restore_user, revoke_user
+from .cache import bump_category_tree_version, invalidate_baskets, invalidate_good
+from .models import BasketItem, Good, GoodCategory, User
+
+
+@receiver([post_save, post_delete], sender=GoodCategory)
+def invalidate_category_tree(sender, **kwargs):
+    # Версию меняем после коммита, иначе параллельный запрос закэширует старое дерево
+    transaction.on_commit(bump_category_tree_version)
+
+
+def _autocomplete_kind(sender):
+    return autocomplete.GOOD if sender is Good else autocomplete.CATEGORY
+
+# Версию индекса подсказок меняем всегда: индексы других процессов узнают о правке по ней
+@receiver(post_save, sender=Good)
+@receiver(post_save, sender=GoodCategory)
+def update_autocomplete(sender, instance, **kwargs):
+    kind = _autocomplete_kind(sender)
+    pk, title = instance.pk, instance.title
+    transaction.on_commit(lambda: autocomplete.update(kind, pk, title))
+
+@receiver(post_delete, sender=Good)
+@receiver(post_delete, sender=GoodCategory)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    kind = _autocomplete_kind(sender)
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.remove(kind, pk))
+
+@receiver([post_save, post_delete], sender=Good)
+def invalidate_good_cache(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_good(pk)
+    transaction.on_commit(lambda: invalidate_good(pk))
+
+@receiver([post_save, post_delete], sender=BasketItem)
+def invalidate_basket_summary(sender, instance, **kwargs):
+    invalidate_baskets([instance.user_id])
+
+@receiver(post_save, sender=Good)
+def invalidate_baskets_with_good(sender, instance, created, **kwargs):
+    # Цена и название товара входят в сводку корзины
+    if not created:
+        invalidate_baskets(BasketItem.objects.filter(good_id=instance.pk).values_list('user_id', flat=True))
+
+# Токены проверяются без чтения User, поэтому отключённых и удалённых пользователей
+# отмечаем в кэше до истечения их access-токенов
+@receiver(post_save, sender=User)
+def sync_user_revocation(sender, instance, created, **kwargs):
+    if not instance.is_active:
+        revoke_user(instance.pk)
+    elif not created:
+        restore_user(instance.pk)
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    revoke_user(instance.pk)
@@ -1,3 +1,635 @@
-from django.test import TestCase
+import gzip
+import io
+import itertools
+import json
+import re
+import smtplib
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from . import autocomplete, middleware
+from .cache import CATEGORY_TREE_DB_VERSION_KEY, aget_category_tree_version, get_category_tree_version
+from .catalog_io import import_goods
+from .filters import GOOD_ORDERINGS, filter_goods, order_goods
+from .authentication import tokens_for_user
+from .models import (
+    BasketItem, Checkout, CheckoutItem, DeliveryMethod, Good, GoodCategory, OutboxEmail, PaymentMethod, Recipient,
+    Transaction, User,
+)
+from .renderers import FastJSONRenderer
+from .serializers import (
+    GoodCategorySerializer, GoodListSerializer, compiled_good_categories, compiled_good_list,
+)
+
+
+# Индекс, которым должен читаться каждый фильтр; None — индекс порядка сортировки
+GOOD_FILTERS = {
+    'none': ('', None),
+    'category': ('category={leaf}', 'good_category_price_idx'),
+    'seller_id': ('seller_id=7', 'good_seller_created_at_idx'),
+    'price range': ('price_min=10&price_max=12', 'good_price_id_idx'),
+    'category and price range': ('category={leaf}&price_min=100&price_max=900', 'good_category_price_idx'),
+    'seller_id and price range': ('seller_id=7&price_min=10', 'good_seller_created_at_idx'),
+}
+ORDERING_INDEXES = {'created_at': 'good_created_at_id_idx', 'price': 'good_price_id_idx'}
+# SQLite не оценивает размер поддерева (IN с подзапросом) и ради порядка без сортировки
+# читает диапазон цен по индексу цены
+SQLITE_GOOD_INDEXES = {('category and price range', 'price'): 'good_price_id_idx'}
+
+
+# Планы строятся на заполненной таблице после ANALYZE: на пустой планировщик
+# выбирает что угодно, а отключённый seq scan пропустил бы и любой «не тот» индекс
+class GoodQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = GoodCategory.objects.create(title='Root', description='')
+        categories = [
+            GoodCategory.objects.create(title=f'Category {number}', description='', parent=root)
+            for number in range(200)
+        ]
+        cls.leaf = categories[7].pk
+        Good.objects.bulk_create([
+            Good(
+                title=f'Good {number}', description='', price=number % 1000,
+                seller_id=number % 500, category=categories[number % 200],
+            )
+            for number in range(10_000)
+        ], batch_size=2000)
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertReadsGoodsBy(self, queryset, index, filtered):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotRegex(plan, r'Seq Scan on "?api_good"?\b')
+            self.assertRegex(
+                plan, rf'(Index Scan|Index Only Scan)( Backward)? using {index} on "?api_good"?\b|Bitmap Index Scan on {index}\b',
+            )
+        else:
+            # SCAN ... USING INDEX — полный обход по индексу; допустим только без фильтра, когда его обрывает LIMIT
+            access = 'SEARCH' if filtered else 'SCAN'
+            self.assertRegex(plan, rf'\b{access} api_good USING (COVERING )?INDEX {index}\b')
+            self.assertNotRegex(plan, r'\bSCAN api_good\b(?! USING (COVERING )?INDEX)')
+
+    def test_each_filter_and_ordering_uses_expected_index(self):
+        for (name, (query, index)), ordering in itertools.product(GOOD_FILTERS.items(), GOOD_ORDERINGS):
+            field = ordering.lstrip('-')
+            if connection.vendor == 'sqlite':
+                index = SQLITE_GOOD_INDEXES.get((name, field), index)
+            with self.subTest(filters=name, ordering=ordering):
+                params = QueryDict(f'{query.format(leaf=self.leaf)}&ordering={ordering}')
+                goods = order_goods(filter_goods(Good.objects.all(), params), params)[:50]
+                self.assertReadsGoodsBy(goods, index or ORDERING_INDEXES[field], filtered=bool(query))
+
+
+class GoodFilterTests(TestCase):
+    def test_non_finite_price_is_rejected(self):
+        for value in ['NaN', 'sNaN', 'Infinity', '-inf']:
+            for name in ['price_min', 'price_max']:
+                with self.subTest(name=name, value=value):
+                    response = APIClient().get('/api/goods/', {name: value})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {name: 'A valid number is required.'})
+
+    def test_default_ordering_is_newest_first(self):
+        goods = create_goods(3)
+        for age, good in enumerate(goods):
+            Good.objects.filter(pk=good.pk).update(created_at=timezone.now() - timedelta(days=age))
+        newest_first = [good.pk for good in goods]
+
+        response = APIClient().get('/api/goods/')
+        self.assertEqual([item['id'] for item in response.json()['results']], newest_first)
+        response = APIClient().get('/api/goods/', {'pagination': 'cursor'})
+        self.assertEqual([item['id'] for item in response.json()['items']], newest_first)
+
+def create_goods(count, category=None, **fields):
+    category = category or GoodCategory.objects.create(title='Category', description='')
+    return Good.objects.bulk_create([
+        Good(
+            title=f'Good {number}', description='', price=fields.get('price', 10 + number),
+            seller_id=fields.get('seller_id', 1), category=category,
+        )
+        for number in range(count)
+    ])
+
+def run_in_threads(threads, calls, func):
+    # Каждый поток со своим соединением; старт по барьеру, чтобы запросы шли одновременно
+    barrier = threading.Barrier(threads)
+
+    def worker(_):
+        try:
+            barrier.wait()
+            for _ in range(calls):
+                func()
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(worker, range(threads)))
+
+
+class BasketUpsertConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('in-memory SQLite cannot be written from several threads')
+        self.user = User.objects.create_user('buyer@example.com')
+        self.good, = create_goods(1)
+
+    def test_parallel_adds_keep_one_row_and_full_count(self):
+        threads, calls = 20, 10
+        run_in_threads(threads, calls, lambda: BasketItem.objects.add(self.user.pk, self.good.pk, 2))
+
+        items = BasketItem.objects.filter(user=self.user, good=self.good)
+        self.assertEqual(items.count(), 1)
+        self.assertEqual(items.get().count, threads * calls * 2)
+
+    def test_add_missing_good_creates_nothing(self):
+        self.assertIsNone(BasketItem.objects.add(self.user.pk, self.good.pk + 1000, 1))
+        self.assertFalse(BasketItem.objects.exists())
+
+
+class BasketBatchTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer@example.com')
+        self.goods = create_goods(2)
+        self.client = api_client(self.user)
+
+    def post(self, *good_ids):
+        operations = [{'goodId': good_id, 'op': 'add', 'count': 1} for good_id in good_ids]
+        return self.client.post('/api/me/basket-items/batch/', {'operations': operations}, format='json')
+
+    def test_missing_good_returns_404_and_changes_nothing(self):
+        response = self.post(self.goods[0].pk, self.goods[1].pk + 1000)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['goodIds'], [self.goods[1].pk + 1000])
+        self.assertFalse(BasketItem.objects.exists())
+
+    def test_good_deleted_before_write_returns_404(self):
+        deleted = self.goods[1]
+        bulk_create = BasketItem.objects.bulk_create
+
+        # Товар удаляет другое соединение уже после проверки, прямо перед записью строк корзины
+        def delete_then_create(*args, **kwargs):
+            run_in_threads(1, 1, lambda: Good.objects.filter(pk=deleted.pk).delete())
+            return bulk_create(*args, **kwargs)
+
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite readers block the concurrent delete from committing')
+        with mock.patch.object(BasketItem.objects, 'bulk_create', delete_then_create):
+            response = self.post(self.goods[0].pk, deleted.pk)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['goodIds'], [deleted.pk])
+        self.assertFalse(BasketItem.objects.exists())
+
+
+class CompiledSerializerParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = GoodCategory.objects.create(title='Root «ü»', description='')
+        child = GoodCategory.objects.create(title='Child "quoted"\\', description='x', parent=root)
+        prices = [Decimal('0'), Decimal('0.10'), Decimal('19.99'), Decimal('1') / 3, Decimal('12345678.90')]
+        for number, price in enumerate(prices):
+            create_goods(1, category=child if number % 2 else root, price=price, seller_id=number)
+
+    def render(self, data):
+        return FastJSONRenderer().render(data)
+
+    def assertParity(self, serializer_class, compiled, queryset, fields=None):
+        expected = serializer_class(queryset, many=True).data
+        if fields is not None:
+            expected = [{name: item[name] for name in item if name in fields} for item in expected]
+        compiled = compiled.select(fields)
+        self.assertEqual(self.render(compiled.from_instances(queryset)), self.render(expected))
+        self.assertEqual(self.render(compiled.from_values(compiled.values(queryset))), self.render(expected))
+
+    def test_good_list(self):
+        self.assertParity(GoodListSerializer, compiled_good_list, Good.objects.order_by('id'))
+
+    def test_categories_with_and_without_parent(self):
+        categories = GoodCategory.objects.order_by('id')
+        self.assertIsNone(categories[0].parent_id)
+        self.assertParity(GoodCategorySerializer, compiled_good_categories, categories)
+
+    def test_field_subsets(self):
+        goods = Good.objects.order_by('id')
+        for fields in (['id'], ['price'], ['title', 'id'], ['category', 'price']):
+            with self.subTest(fields=fields):
+                self.assertParity(GoodListSerializer, compiled_good_list, goods, fields)
+
+    def test_goods_endpoint_matches_serializer(self):
+        response = self.client.get('/api/goods/', {'fields': 'id,price'})
+        expected = GoodListSerializer(Good.objects.order_by('-created_at', '-pk'), many=True).data
+        self.assertEqual(
+            self.render(response.json()['results']),
+            self.render([{'id': item['id'], 'price': item['price']} for item in expected]),
+        )
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(user).access_token}')
+    return client
+
+
+# Число запросов списка не должно зависеть от числа строк на странице (нет N+1)
+class QueryCountMixin:
+    page_sizes = (1, 5, 20)
+
+    def assertConstantQueries(self, client, url, make_row, items, page_sizes=None):
+        page_sizes = page_sizes or self.page_sizes
+        expected = None
+        rows = 0
+        # Страница вмещает все строки: меняется только их число
+        with mock.patch.object(PageNumberPagination, 'page_size', max(page_sizes)):
+            for size in page_sizes:
+                for _ in range(size - rows):
+                    make_row()
+                rows = size
+                # Кэши сбрасываются, иначе второй запрос отдаётся из кэша и ничего не проверяет
+                for alias in caches:
+                    caches[alias].clear()
+                if expected is None:
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(url)
+                    expected = len(queries)
+                else:
+                    with self.assertNumQueries(expected):
+                        response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(items(response.json())), size)
+        return expected
+
+
+class ListQueryCountTests(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer@example.com')
+        cls.recipient = Recipient.objects.create(
+            user=cls.user, first_name='Ivan', last_name='Ivanov', address='Street 1', zip_code='101000', phone='+7000',
+        )
+        cls.payment_method = PaymentMethod.objects.create(title='Card', description='')
+        cls.delivery_method = DeliveryMethod.objects.create(title='Courier', description='')
+        cls.goods = create_goods(max(cls.page_sizes))
+
+    def setUp(self):
+        self.client = api_client(self.user)
+        self.goods_left = iter(self.goods)
+
+    def create_checkout(self):
+        good = next(self.goods_left)
+        basket = BasketItem.objects.create(user=self.user, good=good, count=1)
+        checkout = Checkout.objects.create(
+            user=self.user, recipient=self.recipient, basket=basket, payment_method=self.payment_method,
+            delivery_method=self.delivery_method, payment_total=good.price,
+        )
+        CheckoutItem.objects.bulk_create([
+            CheckoutItem(checkout=checkout, good=good, title=good.title, price=good.price, count=1) for _ in range(2)
+        ])
+        return checkout
+
+    def test_goods(self):
+        category = self.goods[0].category
+        Good.objects.all().delete()
+        self.assertConstantQueries(
+            APIClient(), '/api/goods/?ordering=-created_at', lambda: create_goods(1, category=category),
+            lambda data: data['results'],
+        )
+
+    def test_basket(self):
+        self.assertConstantQueries(
+            self.client, '/api/me/basket-items/',
+            lambda: BasketItem.objects.create(user=self.user, good=next(self.goods_left), count=2),
+            lambda data: data['items'],
+        )
+
+    def test_checkouts(self):
+        self.assertConstantQueries(self.client, '/api/checkouts/', self.create_checkout, lambda data: data['results'])
+
+    def test_transactions(self):
+        self.assertConstantQueries(
+            self.client, '/api/transactions/',
+            lambda: Transaction.objects.create(checkout=self.create_checkout(), amount=10, status=Transaction.Status.PENDING),
+            lambda data: data['results'],
+        )
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+
+# Воркер send_outbox работает в своих потоках, поэтому данные должны быть закоммичены
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TransactionTestCase):
+    def send_outbox(self, *args):
+        call_command('send_outbox', '--once', *args)
+
+    def test_login_only_enqueues(self):
+        response = APIClient().post('/api/auth/login/', {'email': 'buyer@example.com'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, 'buyer@example.com')
+        self.assertEqual(email.status, OutboxEmail.Status.PENDING)
+
+    def test_drain_sends_all_batches_and_code_confirms(self):
+        APIClient().post('/api/auth/login/', {'email': 'buyer@example.com'}, format='json')
+        for number in range(6):
+            OutboxEmail.objects.enqueue('Subject', 'Body', f'user{number}@example.com')
+
+        self.send_outbox('--batch-size', '2')
+
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.Status.SENT).exists())
+        self.assertFalse(OutboxEmail.objects.filter(sent_at=None).exists())
+        self.assertFalse(OutboxEmail.objects.exclude(message='').exists())
+
+        otp_message = next(message for message in mail.outbox if message.to == ['buyer@example.com'])
+        code = re.search(r'\d{6}', otp_message.body).group()
+        response = APIClient().post('/api/auth/confirm/', {'email': 'buyer@example.com', 'otp': code}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(EMAIL_BACKEND='api.tests.FailingEmailBackend')
+    def test_retries_with_backoff_then_fails(self):
+        email = OutboxEmail.objects.enqueue('Subject', 'Body', 'buyer@example.com')
+        options = ['--max-attempts', '3', '--backoff', '10']
+
+        started = timezone.now()
+        with self.assertLogs('api.management.commands.send_outbox', 'WARNING'):
+            self.send_outbox(*options)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.Status.PENDING, 1))
+        self.assertIn('Connection unexpectedly closed', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=10))
+
+        # Пока не подошло время следующей попытки, письмо не берётся
+        self.send_outbox(*options)
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+
+        for attempts, delay in [(2, 20), (3, None)]:
+            OutboxEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+            started = timezone.now()
+            with self.assertLogs('api.management.commands.send_outbox', 'WARNING'):
+                self.send_outbox(*options)
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempts)
+            if delay:
+                self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=delay))
+
+        self.assertEqual(email.status, OutboxEmail.Status.FAILED)
+        self.assertEqual(email.message, '')
+        self.assertEqual(mail.outbox, [])
+
+    def test_sweep_deletes_old_finished_emails(self):
+        old = timezone.now() - timedelta(days=8)
+
+        def email(status, created_at=None, sent_at=None):
+            email = OutboxEmail.objects.create(subject='Subject', recipient='buyer@example.com', status=status, sent_at=sent_at)
+            OutboxEmail.objects.filter(id=email.id).update(created_at=created_at or email.created_at)
+            return email
+
+        kept = [email(OutboxEmail.Status.PENDING, created_at=old), email(OutboxEmail.Status.SENT, sent_at=timezone.now())]
+        email(OutboxEmail.Status.SENT, created_at=old, sent_at=old)
+        email(OutboxEmail.Status.FAILED, created_at=old)
+
+        call_command('sweep_outbox', '--days', '7', '--batch-size', '1', stdout=io.StringIO())
+
+        self.assertEqual(set(OutboxEmail.objects.values_list('id', flat=True)), {email.id for email in kept})
+
+
+class LoginThrottleTests(TestCase):
+    def test_forwarded_for_does_not_open_new_ip_buckets(self):
+        client = APIClient(REMOTE_ADDR='203.0.113.7')
+        statuses = [
+            client.post(
+                '/api/auth/login/', {'email': f'user{number}@example.com'}, format='json',
+                HTTP_X_FORWARDED_FOR=f'198.51.100.{number}',
+            ).status_code
+            for number in range(21)
+        ]
+        self.assertEqual(statuses[:20], [200] * 20)
+        self.assertEqual(statuses[20], 429)
+
+
+
+class GoodImportTests(TestCase):
+    def setUp(self):
+        self.category = GoodCategory.objects.create(title='Category', description='')
+
+    def jsonl(self, *rows):
+        return io.StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+    def test_jsonl_numeric_prices(self):
+        rows = [
+            {'title': title, 'description': 'Imported', 'price': price, 'seller_id': 1, 'category_id': self.category.pk}
+            for title, price in [('Float', 3.3), ('Half', 10.5), ('Integer', 7), ('String', '19.99')]
+        ]
+        result = import_goods(self.jsonl(*rows), 'jsonl')
+
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['created'], 4)
+        self.assertEqual(
+            dict(Good.objects.values_list('title', 'price')),
+            {'Float': Decimal('3.3'), 'Half': Decimal('10.5'), 'Integer': Decimal('7'), 'String': Decimal('19.99')},
+        )
+
+    def post_import(self, user):
+        row = {'title': 'Uploaded', 'description': 'Imported', 'price': 5.5, 'seller_id': 1, 'category_id': self.category.pk}
+        upload = SimpleUploadedFile('goods.jsonl', self.jsonl(row).getvalue().encode())
+        return api_client(user).post('/api/goods/import/', {'file': upload}, format='multipart')
+
+    def test_staff_user_can_import(self):
+        staff = User.objects.create_user('staff@example.com')
+        staff.is_staff = True
+        staff.save()
+        response = self.post_import(staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertTrue(Good.objects.filter(title='Uploaded', price=Decimal('5.5')).exists())
+
+    def test_regular_user_cannot_import(self):
+        response = self.post_import(User.objects.create_user('buyer@example.com'))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Good.objects.exists())
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = autocomplete.PrefixIndex()
+
+    def complete(self, query, limit=10):
+        return [item['id'] for item in self.index.complete(query, limit)]
+
+    def test_updates_leave_built_arrays_untouched(self):
+        self.index.build([(autocomplete.GOOD, 1, 'Red phone'), (autocomplete.GOOD, 2, 'Blue phone')])
+        words = list(self.index.words)
+
+        self.index.update(autocomplete.GOOD, 1, 'Green kettle')
+        self.index.update(autocomplete.GOOD, 3, 'Red kettle')
+        self.index.remove(autocomplete.GOOD, 2)
+
+        self.assertEqual(self.index.words, words)
+        self.assertEqual(self.complete('phone'), [])
+        self.assertEqual(self.complete('ket'), [1, 3])
+        self.assertEqual(self.complete('red'), [3])
+
+    def test_changes_during_build_are_kept(self):
+        def items():
+            yield autocomplete.GOOD, 1, 'Old title'
+            self.index.update(autocomplete.GOOD, 2, 'Added while building')
+            self.index.remove(autocomplete.GOOD, 1)
+
+        self.index.build(items())
+        self.assertEqual(self.complete('old'), [])
+        self.assertEqual(self.complete('build'), [2])
+
+    def test_word_and_prefix_scans_the_narrowest_range(self):
+        titles = [(autocomplete.GOOD, pk, f'Phone {pk}') for pk in range(1, 5001)]
+        self.index.build([*titles, (autocomplete.GOOD, 5001, 'Zebra phone')])
+        self.assertEqual(self.complete('zebra ph'), [5001])
+        self.assertEqual(self.complete('ph zeb'), [5001])
+        self.assertEqual(len(self.complete('phone', limit=50)), 50)
+
+
+class AutocompleteFreshnessTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(autocomplete, 'index', autocomplete.PrefixIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches['default'].delete(autocomplete.VERSION_KEY)
+        self.category = GoodCategory.objects.create(title='Kettles', description='')
+
+    def test_other_process_change_triggers_rebuild(self):
+        autocomplete.complete('ket')
+        autocomplete.index.built_at -= autocomplete.REBUILD_INTERVAL
+        autocomplete.index.checked_at = 0
+
+        with mock.patch.object(autocomplete, 'is_shared_cache', return_value=True), \
+                mock.patch.object(autocomplete, 'rebuild_in_background') as rebuild:
+            autocomplete.complete('ket')
+            rebuild.assert_not_called()
+
+            # Правка в другом процессе: версия в общем кэше ушла вперёд
+            caches['default'].incr(autocomplete.VERSION_KEY)
+            autocomplete.index.checked_at = 0
+            autocomplete.complete('ket')
+            rebuild.assert_called_once()
+
+    def test_own_change_keeps_index_current(self):
+        autocomplete.complete('ket')
+        with self.captureOnCommitCallbacks(execute=True):
+            Good.objects.create(title='Steel kettle', description='', price=10, seller_id=1, category=self.category)
+        self.assertEqual(autocomplete.index.version, autocomplete.get_version())
+        self.assertEqual([item['title'] for item in autocomplete.complete('ket')], ['Steel kettle', 'Kettles'])
+
+    def test_unshared_cache_rebuilds_by_age(self):
+        autocomplete.complete('ket')
+        autocomplete.index.built_at -= autocomplete.MAX_AGE
+        autocomplete.index.checked_at = 0
+        with mock.patch.object(autocomplete, 'is_shared_cache', return_value=False), \
+                mock.patch.object(autocomplete, 'rebuild_in_background') as rebuild:
+            autocomplete.complete('ket')
+        rebuild.assert_called_once()
+
+
+# Без общего кэша: версия дерева берётся из БД
+@mock.patch('api.cache.is_shared_cache', return_value=False)
+class CategoryTreeVersionTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def get_tree(self):
+        return APIClient().get('/api/good-categories/tree/')
+
+    def test_change_from_another_process_is_seen_after_check_ttl(self, is_shared_cache):
+        category = GoodCategory.objects.create(title='Old title', description='')
+        first = self.get_tree()
+
+        # Правка в другом процессе: его сигнал меняет только его собственный LocMem
+        GoodCategory.objects.filter(pk=category.pk).update(
+            title='New title', updated_at=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertEqual(self.get_tree().content, first.content)
+
+        caches['default'].delete(CATEGORY_TREE_DB_VERSION_KEY)
+        second = self.get_tree()
+        self.assertIn(b'New title', second.content)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(async_to_sync(aget_category_tree_version)(), get_category_tree_version())
+
+    def test_own_change_is_seen_at_once(self, is_shared_cache):
+        category = GoodCategory.objects.create(title='Old title', description='')
+        self.get_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            category.title = 'New title'
+            category.save()
+        self.assertIn(b'New title', self.get_tree().content)
+
+@override_settings(COMPRESSION_MIN_SIZE=1024, COMPRESSION_BROTLI_QUALITY=5)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"title": "Good"}' * 200
+
+    def compress(self, accept_encoding, response):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return middleware.CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None):
+        response = HttpResponse(body or self.body, content_type='application/json')
+        response['ETag'] = '"v1"'
+        return response
+
+    def test_small_response_is_not_compressed(self):
+        response = self.compress('gzip, br', self.json_response(b'{}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{}')
+
+    def test_gzip_when_br_not_accepted(self):
+        response = self.compress('gzip, br;q=0', self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_gzip_when_brotli_not_installed(self):
+        with mock.patch.object(middleware, 'brotli', None):
+            response = self.compress('br, gzip', self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    @unittest.skipUnless(middleware.brotli, 'brotli is not installed (requirements-optional.txt)')
+    def test_brotli(self):
+        response = self.compress('gzip, br', self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @unittest.skipUnless(middleware.brotli, 'brotli is not installed (requirements-optional.txt)')
+    def test_brotli_streaming(self):
+        chunks = [self.body[:1000], self.body[1000:]]
+        response = self.compress('br', StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(middleware.brotli.decompress(b''.join(response.streaming_content)), self.body)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+
+# Хранилища token bucket: consume атомарно списывает токен и возвращает
+# (разрешено, сколько секунд ждать до следующего токена)
+class LocalBucketStore:
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+# Тот же алгоритм одним Lua-скриптом в Redis — общий для всех узлов
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketStore:
+    def __init__(self, alias='default'):
+        # Клиент кэша alias (бэкенд django-redis); соединение открывается при первом запросе
+        from django_redis import get_redis_connection
+
+        self.client = get_redis_connection(alias)
+        self.script = self.client.register_script(TOKEN_BUCKET_LUA)
+
+    def consume(self, key, capacity, rate):
+        allowed, tokens = self.script(keys=[f'throttle:{key}'], args=[capacity, rate])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+
+STORES = {
+    'local': LocalBucketStore,
+    'redis': RedisBucketStore,
+}
+
+store = STORES[getattr(settings, 'THROTTLE_STORE', 'local')]()
+
+
+def parse_rate(rate):
+    # '5/min' -> (5 токенов, пополнение 5 токенов в минуту)
+    num, period = rate.split('/')
+    duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return int(num), int(num) / duration
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def __init__(self):
+        self.capacity, self.rate = parse_rate(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][self.scope])
+        self.retry_after = None
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self.retry_after = store.consume(f'{self.scope}:{key}', self.capacity, self.rate)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+class EmailThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        return email.strip().lower()
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = 'login_email'
+
+class ConfirmIPThrottle(IPThrottle):
+    scope = 'confirm_ip'
+
+class ConfirmEmailThrottle(EmailThrottle):
+    scope = 'confirm_email'
@@ -6,7 +6,15 @@ from .views import (
     ConfirmView,
     GoodCategoryDetailView,
     GoodCategoryListView,
+    GoodCategoryTreeView,
+    GoodCategorySubtreeView,
+    GoodCategoryAncestorsView,
     GoodListView, 
+    GoodSearchView,
+    GoodImportView,
+    GoodExportView,
+    GoodFeedView,
+    AutocompleteView,
     GoodDetailView,
     PaymentMethodListView, 
     PaymentMethodDetailView,
@@ -14,8 +22,10 @@ from .views import (
     DeliveryMethodDetailView,
     BasketItemView,
     BasketItemsView,
+    BasketBatchView,
     CheckoutDetailView,
     CheckoutListCreateView,
+    CheckoutFromBasketView,
     TransactionListCreateView,
     TransactionDetailView,
     UserRecipientAPIView,
@@ -23,6 +33,14 @@ from .views import (
     UserRecipientDetailView,
 )
 
+from .async_views import (
+    AsyncGoodListView,
+    AsyncGoodDetailView,
+    AsyncGoodCategoryTreeView,
+    AsyncGoodCategoryDetailView,
+    AsyncBasketItemsView,
+)
+
 router = DefaultRouter()
 
 urlpatterns = [
@@ -31,8 +49,16 @@ urlpatterns = [
     
     path('good-categories/', GoodCategoryListView.as_view(), name='good_category_list'),
     path('good-categories/<int:id>/', GoodCategoryDetailView.as_view(), name='good_category_detail'), 
+    path('good-categories/tree/', GoodCategoryTreeView.as_view(), name='good_category_tree'),
+    path('good-categories/<int:id>/subtree/', GoodCategorySubtreeView.as_view(), name='good_category_subtree'),
+    path('good-categories/<int:id>/ancestors/', GoodCategoryAncestorsView.as_view(), name='good_category_ancestors'),
 
     path('goods/', GoodListView.as_view(), name='goods_list'),
+    path('goods/search/', GoodSearchView.as_view(), name='goods_search'),
+    path('goods/import/', GoodImportView.as_view(), name='goods_import'),
+    path('goods/export/', GoodExportView.as_view(), name='goods_export'),
+    path('goods/feed/', GoodFeedView.as_view(), name='goods_feed'),
+    path('goods/autocomplete/', AutocompleteView.as_view(), name='goods_autocomplete'),
     path('goods/<int:id>/', GoodDetailView.as_view(), name='goods_detail'),
 
     
@@ -48,14 +74,23 @@ urlpatterns = [
 
     path('me/basket-items/', BasketItemsView.as_view(), name='basket_items'),
     path('me/basket-items/', BasketItemsView.as_view(), name='add_to_basket'),
+    path('me/basket-items/batch/', BasketBatchView.as_view(), name='basket_items_batch'),
     path('me/basket-items/<int:id>', BasketItemView.as_view(), name='delete_basket_item'),
     path('me/basket-items/<int:id>', BasketItemView.as_view(), name='update_basket_item'),
 
     path('checkouts/', CheckoutListCreateView.as_view(), name='checkout_list_create'),
+    path('checkouts/from-basket/', CheckoutFromBasketView.as_view(), name='checkout_from_basket'),
     path('checkouts/<int:pk>/', CheckoutDetailView.as_view(), name='checkout_detail'),
 
     path('transactions/', TransactionListCreateView.as_view(), name='transaction_list_create'),
     path('transactions/<int:pk>/', TransactionDetailView.as_view(), name='transaction_detail'),
+
+    # Async-версии для ASGI
+    path('async/goods/', AsyncGoodListView.as_view(), name='async_goods_list'),
+    path('async/goods/<int:id>/', AsyncGoodDetailView.as_view(), name='async_goods_detail'),
+    path('async/good-categories/tree/', AsyncGoodCategoryTreeView.as_view(), name='async_good_category_tree'),
+    path('async/good-categories/<int:id>/', AsyncGoodCategoryDetailView.as_view(), name='async_good_category_detail'),
+    path('async/me/basket-items/', AsyncBasketItemsView.as_view(), name='async_basket_items'),
 ]
 
 urlpatterns.extend(router.urls)
@@ -1,21 +1,28 @@
 from django.shortcuts import render
 
-import random
+import io
 from rest_framework import status, pagination
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, Max, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAdminUser
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from .models import (
     User, 
-    OTP,
+    OutboxEmail,
     GoodCategory, 
     Good,
     PaymentMethod,
@@ -35,30 +42,52 @@ from .serializers import (
     RecipientSerializer,
     BasketItemSerializer,
     AddToBasketSerializer,
+    BasketBatchSerializer,
+    BasketSummarySerializer,
     CheckoutSerializer, 
+    CheckoutReadSerializer,
+    CheckoutFromBasketSerializer,
     TransactionSerializer,
+    TransactionReadSerializer,
+    build_category_tree,
+    compiled_good_categories,
+    compiled_good_list,
 )
+from . import autocomplete
+from .authentication import tokens_for_user
+from . import otp as otp_store
+from .cache import get_basket_summary, get_category_tree, get_good_json
+from .catalog_io import FORMATS as CATALOG_FORMATS, detect_format, export_goods, import_goods
+from .filters import filter_goods, get_sparse_fields, order_goods
+from .mixins import ConditionalGetMixin
+from .pagination import GoodCursorPagination
+from .throttling import ConfirmEmailThrottle, ConfirmIPThrottle, LoginEmailThrottle, LoginIPThrottle
+from .search import search_goods
 
 
 class LoginView(APIView):
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
     def post(self, request):
         email = request.data.get('email')
         if not email:
             return Response({'error': 'Введите свою почту'}, status=status.HTTP_400_BAD_REQUEST)
 
-        otp_code = random.randint(100000, 999999)
-        OTP.objects.create(email=email, otp=str(otp_code))
+        otp_code = otp_store.issue(email)
 
-        send_mail(
+        # Письмо отправит команда send_outbox, запрос не ждёт SMTP
+        OutboxEmail.objects.enqueue(
             subject='OTP Code',
             message=f'Your OTP code is {otp_code}',
+            recipient=email,
             from_email='noreply@example.com',
-            recipient_list=[email],
         )
 
         return Response({'message': 'OTP sent to email'}, status=status.HTTP_200_OK)
 
 class ConfirmView(APIView):
+    throttle_classes = [ConfirmIPThrottle, ConfirmEmailThrottle]
+
     def post(self, request):
         email = request.data.get('email')
         otp = request.data.get('otp')
@@ -66,19 +95,15 @@ class ConfirmView(APIView):
         if not email or not otp:
             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            otp_entry = OTP.objects.get(email=email, otp=otp)
-        except OTP.DoesNotExist:
+        result = otp_store.verify(email, otp)
+        if result == otp_store.INVALID:
             return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not otp_entry.is_valid():
+        if result == otp_store.EXPIRED:
             return Response({'error': 'OTP has expired'}, status=status.HTTP_400_BAD_REQUEST)
 
         user, created = User.objects.get_or_create(email=email)
 
-        otp_entry.delete()
-
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         access_token = str(refresh.access_token)
 
         response = Response({'access_token': access_token}, status=status.HTTP_200_OK)
@@ -92,8 +117,11 @@ class ConfirmView(APIView):
 
         return response
 
-class GoodCategoryDetailView(APIView):
+class GoodCategoryDetailView(ConditionalGetMixin, APIView):
     def get(self, request, id):
+        return self.conditional_get(request, GoodCategory.objects.filter(id=id), lambda: self.render(id))
+
+    def render(self, id):
         try:
             category = GoodCategory.objects.get(id=id)
             serializer = GoodCategorySerializer(category)
@@ -120,21 +148,47 @@ class GoodCategoryDetailView(APIView):
         except GoodCategory.DoesNotExist:
             return Response({"error": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
 
-class GoodCategoryListView(APIView):
+class GoodCategoryTreeView(APIView):
+    def get(self, request):
+        version, body = get_category_tree(
+            lambda: build_category_tree(GoodCategory.objects.order_by('path'))
+        )
+        etag = f'"{version}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+class GoodCategorySubtreeView(APIView):
+    def get(self, request, id):
+        category = get_object_or_404(GoodCategory.objects.only('path'), id=id)
+        categories = GoodCategory.objects.filter(path__startswith=category.path).order_by('path')
+        return Response(build_category_tree(categories)[0])
+
+class GoodCategoryAncestorsView(APIView):
+    def get(self, request, id):
+        category = get_object_or_404(GoodCategory.objects.only('path'), id=id)
+        ancestors = GoodCategory.objects.filter(id__in=category.get_ancestor_ids()).order_by('depth')
+        return Response(compiled_good_categories.from_instances(ancestors))
+
+class GoodCategoryListView(ConditionalGetMixin, APIView):
     def get(self, request):
-        categories = GoodCategory.objects.all()
+        categories = GoodCategory.objects.order_by('id')
+        return self.conditional_get(request, categories, lambda: self.render(request, categories))
+
+    def render(self, request, categories):
         paginator = pagination.PageNumberPagination()
-        paginated_categories = paginator.paginate_queryset(categories, request)
-        serializer = GoodCategorySerializer(paginated_categories, many=True)
+        paginated_categories = paginator.paginate_queryset(compiled_good_categories.values(categories), request)
 
         next_page = paginator.get_next_link()
         prev_page = paginator.get_previous_link()
 
         response_data = GoodCategoriesListResponseSerializer({
-            "totalCount": categories.count(),
+            "totalCount": paginator.page.paginator.count,
             "nextPage": next_page,
             "prevPage": prev_page,
-            "items": serializer.data
+            "items": compiled_good_categories.from_values(paginated_categories)
         }).data
 
         return paginator.get_paginated_response(response_data)
@@ -146,14 +200,29 @@ class GoodCategoryListView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)        
 
-class GoodListView(APIView, PageNumberPagination):
+class GoodListView(ConditionalGetMixin, APIView, PageNumberPagination):
     page_size = 50
 
+    # Валидаторы считаются по строкам уже выбранной страницы, без отдельного COUNT/MAX
     def get(self, request):
-        goods = Good.objects.all()
+        compiled = compiled_good_list.select(get_sparse_fields(request.query_params, GoodListSerializer.Meta.fields))
+        goods = filter_goods(Good.objects.all(), request.query_params)
+        # description и search_vector в списке не нужны; даты и цена — для валидаторов, курсора и сортировки
+        goods = goods.only(*compiled.columns, 'created_at', 'updated_at', 'price')
+        if GoodCursorPagination.is_requested(request):
+            paginator = GoodCursorPagination()
+            results = paginator.paginate_queryset(goods, request)
+            etag, last_modified = self.get_rows_validators(request, results, paginator.next_cursor)
+            return self.conditional_response(request, etag, last_modified, lambda: paginator.get_paginated_response(
+                compiled.from_instances(results)
+            ))
+
+        goods = order_goods(goods, request.query_params)
         results = self.paginate_queryset(goods, request, view=self)
-        serializer = GoodListSerializer(results, many=True)
-        return self.get_paginated_response(serializer.data)
+        etag, last_modified = self.get_rows_validators(request, results, self.page.paginator.count)
+        return self.conditional_response(request, etag, last_modified, lambda: self.get_paginated_response(
+            compiled.from_instances(results)
+        ))
     
     def post(self, request):
         serializer = GoodSerializer(data=request.data)
@@ -162,11 +231,92 @@ class GoodListView(APIView, PageNumberPagination):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
 
-class GoodDetailView(APIView):
+class GoodSearchView(APIView):
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Search query is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        goods, next_cursor = search_goods(query, request.query_params.get('cursor'))
+        return Response({
+            'nextCursor': next_cursor,
+            'items': compiled_good_list.from_instances(goods),
+        }, status=status.HTTP_200_OK)
+
+class AutocompleteView(APIView):
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        items = autocomplete.complete(request.query_params.get('q', ''), limit)
+        return Response({'items': items}, status=status.HTTP_200_OK)
+
+class GoodImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'File is required'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.query_params.get('fileFormat') or detect_format(upload.name)
+        if fmt not in CATALOG_FORMATS:
+            return Response({'error': f'Supported formats: {", ".join(CATALOG_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Файл читается построчно, большие загрузки Django держит во временном файле
+        stream = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        result = import_goods(stream, fmt)
+        return Response(result, status=status.HTTP_200_OK)
+
+class GoodExportView(APIView):
+    def get(self, request):
+        fmt = request.query_params.get('fileFormat', 'csv')
+        if fmt not in CATALOG_FORMATS:
+            return Response({'error': f'Supported formats: {", ".join(CATALOG_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        goods = filter_goods(Good.objects.all(), request.query_params)
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_goods(goods, fmt), content_type=f'{content_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="goods.{fmt}"'
+        return response
+
+class GoodFeedView(APIView):
+    # Весь каталог одним потоком NDJSON в порядке (updated_at, id).
+    # X-Feed-Watermark — значение updated_since для следующей синхронизации
+    def get(self, request):
+        watermark = timezone.now()
+        goods = filter_goods(Good.objects.all(), request.query_params)
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_datetime(updated_since)
+            except ValueError:
+                updated_since = None
+            if updated_since is None:
+                raise ValidationError({'updated_since': 'A valid ISO 8601 datetime is required.'})
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since, dt_timezone.utc)
+            goods = goods.filter(updated_at__gt=updated_since)
+
+        response = StreamingHttpResponse(
+            export_goods(goods, 'jsonl', ordering=('updated_at', 'id')),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['X-Feed-Watermark'] = watermark.isoformat()
+        return response
+
+class GoodDetailView(ConditionalGetMixin, APIView):
     def get(self, request, id):
-        good = get_object_or_404(Good, id=id)
-        serializer = GoodSerializer(good)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build():
+            good = get_object_or_404(Good, id=id)
+            return good.updated_at, GoodSerializer(good).data
+
+        # Валидаторы хранятся в кэше вместе с телом, поэтому 304 отдаётся без обращения к БД
+        last_modified, body = get_good_json(id, build)
+        etag = self.make_etag(request, last_modified.isoformat())
+        return self.conditional_response(
+            request, etag, last_modified, lambda: HttpResponse(body, content_type='application/json')
+        )
     
     def patch(self, request, id):
         good = get_object_or_404(Good, id=id)
@@ -245,13 +395,12 @@ class DeliveryMethodDetailView(APIView):
         delivery_method.delete()
         return Response({"message": "Delivery method deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
-class AdminRecipientAPIView(APIView):
+class AdminRecipientAPIView(ConditionalGetMixin, APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
         recipients = Recipient.objects.all()
-        serializer = RecipientSerializer(recipients, many=True)
-        return Response(serializer.data)
+        return self.conditional_get(request, recipients, lambda: Response(RecipientSerializer(recipients, many=True).data))
 
     def post(self, request):
         serializer = RecipientSerializer(data=request.data)
@@ -260,32 +409,36 @@ class AdminRecipientAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserRecipientAPIView(APIView):
+class UserRecipientAPIView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    etag_per_user = True
 
     def get(self, request):
-        recipients = Recipient.objects.filter(user=request.user)
-        serializer = RecipientSerializer(recipients, many=True)
-        return Response(serializer.data)
+        recipients = Recipient.objects.filter(user_id=request.user.pk)
+        return self.conditional_get(request, recipients, lambda: Response(RecipientSerializer(recipients, many=True).data))
 
     def post(self, request):
         serializer = RecipientSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            serializer.save(user_id=request.user.pk)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class UserRecipientDetailView(APIView):
+class UserRecipientDetailView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    etag_per_user = True
     
     def get(self, request, id):
+        return self.conditional_get(request, Recipient.objects.filter(id=id), lambda: self.render(id))
+
+    def render(self, id):
         recipient = get_object_or_404(Recipient, id=id)
         serializer = RecipientSerializer(recipient)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request, id):
         try:
-            recipient = Recipient.objects.get(pk=id, user=request.user)
+            recipient = Recipient.objects.get(pk=id, user_id=request.user.pk)
         except Recipient.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -297,7 +450,7 @@ class UserRecipientDetailView(APIView):
 
     def delete(self, request, id):
         try:
-            recipient = Recipient.objects.get(pk=id, user=request.user)
+            recipient = Recipient.objects.get(pk=id, user_id=request.user.pk)
         except Recipient.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -309,7 +462,7 @@ class BasketItemView(APIView):
 
     def delete(self, request, id):
         try:
-            basket_item = BasketItem.objects.get(id=id, user=request.user)
+            basket_item = BasketItem.objects.get(id=id, user_id=request.user.pk)
         except BasketItem.DoesNotExist:
             return Response({"error": "Basket item not found"}, status=status.HTTP_404_NOT_FOUND)
         
@@ -318,7 +471,7 @@ class BasketItemView(APIView):
 
     def patch(self, request, id):
         try:
-            basket_item = BasketItem.objects.get(id=id, user=request.user)
+            basket_item = BasketItem.objects.get(id=id, user_id=request.user.pk)
         except BasketItem.DoesNotExist:
             return Response({"error": "Basket item not found"}, status=status.HTTP_404_NOT_FOUND)
         
@@ -331,16 +484,43 @@ class BasketItemView(APIView):
         
         return Response(BasketItemSerializer(basket_item).data)
 
-class BasketItemsView(APIView):
+BASKET_LINE_TOTAL = ExpressionWrapper(F('count') * F('good__price'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+def basket_totals():
+    return {
+        'totalCount': Count('id'),
+        'totalQuantity': Coalesce(Sum('count'), 0),
+        'totalPrice': Coalesce(Sum(BASKET_LINE_TOTAL), Value(Decimal('0')), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        'items_modified': Max('updated_at'),
+        'goods_modified': Max('good__updated_at'),
+    }
+
+def basket_lines(basket_items):
+    return (
+        basket_items.select_related('good')
+        .only('id', 'count', 'good__id', 'good__title', 'good__price')
+        .annotate(line_total=BASKET_LINE_TOTAL)
+        .order_by('id')
+    )
+
+def render_basket_summary(totals, items):
+    data = BasketSummarySerializer({**totals, 'items': items}).data
+    stamps = [stamp for stamp in (totals['items_modified'], totals['goods_modified']) if stamp]
+    return max(stamps, default=None), dict(data)
+
+def build_basket_summary(user_id):
+    basket_items = BasketItem.objects.filter(user_id=user_id)
+    return render_basket_summary(basket_items.aggregate(**basket_totals()), list(basket_lines(basket_items)))
+
+class BasketItemsView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    etag_per_user = True
 
     def get(self, request):
-        basket_items = BasketItem.objects.filter(user=request.user)
-        serializer = BasketItemSerializer(basket_items, many=True)
-        return Response({
-            "totalCount": basket_items.count(),
-            "items": serializer.data
-        }, status=status.HTTP_200_OK)
+        user_id = request.user.pk
+        last_modified, data = get_basket_summary(user_id, lambda: build_basket_summary(user_id))
+        etag = self.make_etag(request, last_modified and last_modified.isoformat(), data['totalCount'], data['totalPrice'])
+        return self.conditional_response(request, etag, last_modified, lambda: Response(data, status=status.HTTP_200_OK))
     
     def post(self, request):
         serializer = AddToBasketSerializer(data=request.data)
@@ -349,42 +529,170 @@ class BasketItemsView(APIView):
         good_id = serializer.validated_data['goodId']
         count = serializer.validated_data['count']
         
-        try:
-            good = Good.objects.get(id=good_id)
-        except Good.DoesNotExist:
+        basket_item = BasketItem.objects.add(request.user.pk, good_id, count)
+        if basket_item is None:
             return Response({"error": "Good not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        basket_item, created = BasketItem.objects.get_or_create(
-            user=request.user, 
-            good=good, 
-            defaults={"count": count}
-        )
-        if not created:
-            basket_item.save()
-        
         return Response(BasketItemSerializer(basket_item).data, status=status.HTTP_201_CREATED)
 
+class BasketBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BasketBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = [
+            (operation['goodId'], operation['op'], operation['count'])
+            for operation in serializer.validated_data['operations']
+        ]
+
+        # Проверка товаров — в той же транзакции, что и запись
+        missing = BasketItem.objects.apply_operations(request.user.pk, operations)
+        if missing:
+            return Response(
+                {"error": "Good not found", "goodIds": sorted(missing)},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        _, data = build_basket_summary(request.user.pk)
+        return Response(data, status=status.HTTP_200_OK)
+
 from rest_framework import generics, permissions
 
-class CheckoutListCreateView(generics.ListCreateAPIView):
+def get_status_filter(request):
+    value = request.query_params.get('status')
+    if value is None:
+        return None
+    if value not in Transaction.Status.values:
+        raise ValidationError({'status': f'Supported values: {", ".join(Transaction.Status.values)}'})
+    return value
+
+# ?fields=... для GET: в ответе и в SELECT остаются только перечисленные поля
+class SparseFieldsViewMixin:
+    read_serializer_class = None
+    default_list_fields = None
+
+    def get_fields(self):
+        if self.request.method != 'GET':
+            return None
+        if not hasattr(self, '_fields'):
+            available = self.read_serializer_class.Meta.fields
+            self._fields = get_sparse_fields(self.request.query_params, available)
+            if self._fields is None and self.default_list_fields is not None and 'pk' not in self.kwargs:
+                self._fields = self.default_list_fields
+        return self._fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs['fields'] = self.get_fields()
+        return super().get_serializer(*args, **kwargs)
+
+CHECKOUT_RELATED_UPDATED_FIELDS = (
+    'recipient__updated_at', 'basket__updated_at', 'basket__good__updated_at',
+    'payment_method__updated_at', 'delivery_method__updated_at',
+)
+TRANSACTION_RELATED_UPDATED_FIELDS = (
+    'checkout__updated_at', 'checkout__payment_method__updated_at', 'checkout__delivery_method__updated_at',
+)
+
+class CheckoutReadMixin(SparseFieldsViewMixin):
+    read_serializer_class = CheckoutReadSerializer
+
+    def get_queryset(self):
+        checkouts = Checkout.objects.filter(user_id=self.request.user.pk)
+        if self.request.method != 'GET':
+            return checkouts
+
+        status_filter = get_status_filter(self.request)
+        if status_filter is not None:
+            checkouts = checkouts.filter(Exists(
+                Transaction.objects.filter(checkout=OuterRef('pk'), status=status_filter)
+            ))
+        return checkouts.for_read(self.get_fields()).order_by('-created_at', '-id')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return CheckoutReadSerializer
+        return CheckoutSerializer
+
+class TransactionReadMixin(SparseFieldsViewMixin):
+    read_serializer_class = TransactionReadSerializer
+    # provider_data бывает большим — в списке только по ?fields=..., в детальном ответе всегда
+    default_list_fields = [name for name in TransactionReadSerializer.Meta.fields if name != 'provider_data']
+
+    def get_queryset(self):
+        transactions = Transaction.objects.filter(checkout__user_id=self.request.user.pk)
+        if self.request.method != 'GET':
+            return transactions
+
+        status_filter = get_status_filter(self.request)
+        if status_filter is not None:
+            transactions = transactions.filter(status=status_filter)
+        return transactions.for_read(self.get_fields()).order_by('-created', '-id')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return TransactionReadSerializer
+        return TransactionSerializer
+
+class CheckoutListCreateView(ConditionalGetMixin, CheckoutReadMixin, generics.ListCreateAPIView):
     queryset = Checkout.objects.all()
     serializer_class = CheckoutSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_per_user = True
+    related_updated_fields = CHECKOUT_RELATED_UPDATED_FIELDS
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.pk)
 
-class CheckoutDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CheckoutDetailView(ConditionalGetMixin, CheckoutReadMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Checkout.objects.all()
     serializer_class = CheckoutSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_per_user = True
+    related_updated_fields = CHECKOUT_RELATED_UPDATED_FIELDS
 
-class TransactionListCreateView(generics.ListCreateAPIView):
+class TransactionListCreateView(ConditionalGetMixin, TransactionReadMixin, generics.ListCreateAPIView):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_per_user = True
+    related_updated_fields = TRANSACTION_RELATED_UPDATED_FIELDS
+    updated_field = 'updated'
 
-class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TransactionDetailView(ConditionalGetMixin, TransactionReadMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_per_user = True
+    related_updated_fields = TRANSACTION_RELATED_UPDATED_FIELDS
+    updated_field = 'updated'
+
+class CheckoutFromBasketView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CheckoutFromBasketSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        if not Recipient.objects.filter(id=data['recipientId'], user_id=request.user.pk).exists():
+            return Response({'error': 'Recipient not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not PaymentMethod.objects.filter(id=data['paymentMethodId']).exists():
+            return Response({'error': 'Payment method not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not DeliveryMethod.objects.filter(id=data['deliveryMethodId']).exists():
+            return Response({'error': 'Delivery method not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        created = Checkout.objects.create_from_basket(
+            request.user.pk, data['recipientId'], data['paymentMethodId'], data['deliveryMethodId'],
+        )
+        if created is None:
+            return Response({'error': 'Basket is empty'}, status=status.HTTP_400_BAD_REQUEST)
+
+        checkout, payment = created
+        checkout = Checkout.objects.for_read().get(pk=checkout.pk)
+        return Response({
+            'checkout': CheckoutReadSerializer(checkout).data,
+            'transaction': TransactionSerializer(payment).data,
+        }, status=status.HTTP_201_CREATED)